@@ -0,0 +1,92 @@
+from typing import Callable, Dict, List, Optional, Any, Iterable, Iterator, Sequence, Set, Tuple, Union
+
+# the keys we can match existing channels on, in their default precedence
+MATCH_KEYS = ( 'name', 'normalized', 'tvg_id' )
+
+# parse and validate a match order, either comma separated or already split
+def parse_match_order( value: Union[str, Sequence[str], None] ) -> List[str]:
+
+    # default if we have nothing
+    if not value:
+        return list( MATCH_KEYS )
+
+    # split it up if we need to, dropping any repeats
+    keys = value.split( ',' ) if isinstance( value, str ) else value
+    keys = list( dict.fromkeys( key.strip( ).lower( ) for key in keys if key.strip( ) ) )
+
+    # make sure we only have keys we know how to match on
+    if not keys or any( key not in MATCH_KEYS for key in keys ):
+        raise ValueError( f"Invalid channel match order '{value}', valid keys are {', '.join( MATCH_KEYS )}" )
+
+    # return the keys
+    return keys
+
+# hash indexes over the existing channels, so lookups don't scan the whole list
+class ChannelIndex:
+
+    # fire it up!
+    def __init__( self, channels: Iterable[Dict[str, Any]], normalize: Callable[[str], str], precedence: Union[str, Sequence[str], None] = None ):
+
+        # setup the internals
+        self.normalize = normalize
+        self.precedence = parse_match_order( precedence )
+        self._indexes: Dict[str, Dict[str, Dict[str, Any]]] = { key: {} for key in MATCH_KEYS }
+        self._by_id: Dict[Any, Dict[str, Any]] = {}
+
+        # load them all up
+        for channel in channels:
+            self.add( channel )
+
+    # index a single channel, the first one we see for a key wins
+    def add( self, channel: Dict[str, Any] ) -> None:
+
+        # skip anything we can't match on
+        if not isinstance( channel, dict ) or not channel.get( 'name' ):
+            return
+
+        # setup the keys
+        self._by_id.setdefault( channel.get( 'id' ), channel )
+        self._indexes['name'].setdefault( channel['name'], channel )
+        self._indexes['normalized'].setdefault( self.normalize( channel['name'] ), channel )
+        if channel.get( 'tvg_id' ):
+            self._indexes['tvg_id'].setdefault( channel['tvg_id'], channel )
+
+    # find the channel for a group, following the configured precedence
+    def find( self, channel_name: str, tvg_id: Optional[str] = None, exclude: Optional[Set[int]] = None ) -> Optional[Dict[str, Any]]:
+        return self.find_all( [( channel_name, tvg_id )], exclude )[0]
+
+    # find the channels for many groups at once, a key at a time across all of them, so a weaker key never takes a channel a stronger one matches for another
+    # group... reserved channels can only be taken by their exact name
+    def find_all( self, groups: Sequence[Tuple[str, Optional[str]]], exclude: Optional[Set[int]] = None, reserved: Optional[Set[int]] = None ) -> List[Optional[Dict[str, Any]]]:
+
+        # hold what we look each group up by, what we've found, and what's been spoken for
+        lookups = [{ 'name': channel_name, 'normalized': self.normalize( channel_name ), 'tvg_id': tvg_id } for channel_name, tvg_id in groups]
+        found: List[Optional[Dict[str, Any]]] = [None] * len( lookups )
+        claimed = set( exclude or ( ) )
+
+        # loop the keys in order, then the groups still looking in their order
+        for key in self.precedence:
+            for position, lookup in enumerate( lookups ):
+                if found[position] is not None or not lookup[key]:
+                    continue
+
+                # see if we have a hit that hasn't already been claimed by another group
+                channel = self._indexes[key].get( lookup[key] )
+                if channel and channel.get( 'id' ) not in claimed and not ( key != 'name' and reserved and channel.get( 'id' ) in reserved ):
+                    found[position] = channel
+                    claimed.add( channel.get( 'id' ) )
+
+        # return them, none where nothing matched
+        return found
+
+    # is a channel id still around
+    def has_id( self, channel_id: Optional[int] ) -> bool:
+        return channel_id in self._by_id
+
+    # the indexed channels
+    def __iter__( self ) -> Iterator[Dict[str, Any]]:
+        return iter( self._by_id.values( ) )
+
+    # how many channels are indexed
+    def __len__( self ) -> int:
+        return len( self._by_id )
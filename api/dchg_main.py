@@ -1,46 +1,163 @@
-from functools import lru_cache
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from requests.adapters import HTTPAdapter
+from pathlib import Path
+import hashlib
+import json
+import math
+import random
+import threading
 import time
 import requests
-from typing import Dict, List, Optional, Any, DefaultDict
+from typing import Dict, List, Optional, Any, DefaultDict, Generator, Iterable, Iterator, Tuple, Sequence, Set, Union
 from utils.exceptions import APIException
-import re
+from utils.json_stream import JSONStream
+from utils.metrics import Metrics
+from utils.output import inherit_prefix
+from utils.snapshot import SnapshotReader, SnapshotWriter
+from api.channel_index import ChannelIndex, parse_match_order
+from api.normalizer import Normalizer
+from api.logo_cache import LogoCache
+from api.prober import DEFAULT_CONNECTIONS, StreamProber
+from api.fuzzy import FuzzyGrouper
+from api.state_store import StateStore
+from api.stream_table import StreamGroup, StreamTable
+from api.token_manager import TokenManager
+
+# per-endpoint ( connect, read ) timeouts in seconds
+TIMEOUTS = {
+    'auth': ( 5, 30 ),
+    'refresh': ( 5, 30 ),
+    'accounts': ( 5, 30 ),
+    'streams': ( 5, 120 ),
+    'channels': ( 5, 60 ),
+    'logos': ( 5, 30 ),
+    'write': ( 5, 30 ),
+}
+
+# methods that are safe to replay, and the statuses worth replaying them on
+IDEMPOTENT_METHODS = { 'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE' }
+RETRY_STATUSES = { 429, 500, 502, 503, 504 }
+
+# statuses that mean the server did not process the request at all
+THROTTLE_STATUSES = { 429, 503 }
+
+# the only stream fields grouping needs, everything else is dropped as the listing is parsed
+STREAM_FIELDS = ( 'id', 'name', 'logo_url', 'tvg_id', 'channel_group', 'm3u_account' )
+
+# bytes to read off the wire at a time when parsing a listing
+CHUNK_SIZE = 65536
+
+# errors reading a listing's body once its headers are in, worth fetching the page again for
+BODY_ERRORS = ( requests.exceptions.ChunkedEncodingError, requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.ContentDecodingError )
+
+# where the server takes several channel updates in one go, if it has it
+BULK_UPDATE_PATH = "/api/channels/channels/edit/bulk/"
+
+# statuses that mean a direct channel create isn't supported, rather than that the channel was bad
+UNSUPPORTED_STATUSES = { 400, 404, 405 }
+
+# journaled write outcomes are saved this many at a time, or this often... losing the last few to a crash only
+# means the resume finds those channels already right
+JOURNAL_FLUSH_SIZE = 100
+JOURNAL_FLUSH_SECONDS = 1.0
+
+# M3U account statuses that mean a refresh is still running, or that it never will
+REFRESH_BUSY = { 'pending', 'fetching', 'parsing' }
+REFRESH_SKIP = { 'disabled', 'pending_setup' }
+
+# what a batch hands back when we were asked to stop before it started
+CANCELLED = object( )
 
 # this is the main class
 class DCHG_Main:
 
     # fire it up!
-    def __init__(self, base_url: str, username: str, password: str, normalizer: str, refresh: bool = False):
+    def __init__(self, base_url: str, username: str, password: str, normalizer: Union[str, Sequence[str], Normalizer, None], refresh: bool = False,
+                 page_size: int = 2500, prefetch: int = 4, workers: int = 4,
+                 match_order: Union[str, Sequence[str], None] = None, folds: Union[str, Sequence[str], None] = None,
+                 fuzzy_threshold: Optional[float] = None, state_file: Union[str, Path, None] = None,
+                 refresh_timeout: float = 600, refresh_accounts: Optional[Sequence[int]] = None,
+                 stop_event: Optional[threading.Event] = None, quiet: bool = False, batch_size: int = 100,
+                 profile: Optional[str] = None, probe_timeout: Optional[float] = None, probe_workers: int = 32,
+                 probe_ttl: float = 21600, accounts: Optional[Sequence[Union[int, str]]] = None,
+                 channel_groups: Optional[Sequence[Union[int, str]]] = None, snapshot_in: Union[str, Path, None] = None,
+                 snapshot_out: Union[str, Path, None] = None, logo_ttl: Optional[float] = None,
+                 time_budget: Optional[float] = None, pins: Optional[Sequence[str]] = None, probe_connections: int = DEFAULT_CONNECTIONS,
+                 probe_insecure: bool = False):
         
         # setup the internals
         self.base_url = base_url.rstrip( '/' )
+        self.profile = profile
         self.username = username
         self.password = password
-        self.normalizer = normalizer
+        self.normalizer = normalizer if isinstance( normalizer, Normalizer ) else Normalizer( normalizer, folds )
         self.refresh = refresh
-        self._auth_headers: Optional[Dict[str, str]] = None
+        self.refresh_timeout = refresh_timeout
+        self.refresh_accounts = list( refresh_accounts ) if refresh_accounts else None
+        self.tokens = TokenManager( self._authenticate, self._refresh_token )
         self.max_retries = 3
-        self.retry_delay = 5  # seconds
+        self.retry_delay = 1  # seconds, doubled per attempt
+        self.retry_max_delay = 30  # seconds
+        self.page_size = max( 1, page_size )
+        self.prefetch = max( 0, prefetch )
+        self.workers = max( 1, workers )
+        self.match_order = parse_match_order( match_order )
+        self.fuzzy = FuzzyGrouper( fuzzy_threshold ) if fuzzy_threshold else None
+        self.state = StateStore( state_file, f"{self.base_url}#{profile}" if profile else self.base_url ) if state_file else None
+        self.prober = StreamProber( probe_timeout, probe_workers, probe_ttl, store=self.state, connections=probe_connections, verify_tls=not probe_insecure ) if probe_timeout else None
+        self.scope_accounts = list( accounts or [] )
+        self.scope_groups = list( channel_groups or [] )
+        self.scoped = bool( self.scope_accounts or self.scope_groups )
+        self.scope_ids: Set[int] = set( )
+        self.logos = LogoCache( self._get_logos, self._create_logo, store=self.state, ttl=logo_ttl, workers=max( 8, self.workers ) ) if logo_ttl is not None else None
+        self.stream_fields = STREAM_FIELDS + ( ( 'url', ) if self.prober else ( ) )
+        self.snapshot_in = snapshot_in
+        self.snapshot_out = snapshot_out
+        self.failures: List[Dict[str, Any]] = []
+        self.stop_event = stop_event or threading.Event( )
+        self.writing = False
+        self.quiet = quiet
+        self.metrics = Metrics( self.base_url, self.profile )
+        self.batch_size = max( 1, batch_size )
+        self.bulk_updates: Optional[bool] = None  # unknown until we probe for it
+        self.direct_create: Optional[bool] = None  # unknown until the first create
+        self.time_budget = time_budget
+        self.deadline: Optional[float] = None  # set when each run starts, if we have a budget
+        self.batch_seconds = 0.0  # how long a batch of writes has been taking
+        self.pins = { self.normalizer.key( pin ).casefold( ) for pin in pins or ( ) }
+        self.deferred: List[Dict[str, Any]] = []
+
+        # one pooled session for every call, sized so every worker keeps its connection alive
+        self.session = requests.Session( )
+        adapter = HTTPAdapter( pool_connections=4, pool_maxsize=max( self.workers, self.prefetch ) + 2, max_retries=0 )
+        self.session.mount( 'http://', adapter )
+        self.session.mount( 'https://', adapter )
 
     # setup a property to hold our authentication headers
     @property
     def auth_headers( self ) -> Dict[str, str]:
         
-        # if the aren't yet set
-        if self._auth_headers is None:
+        # the token manager keeps the token fresh
+        return self._headers( self.tokens.access_token( ) )
 
-            # grab the token from the api
-            tokens = self._authenticate_with_retry( )
+    # build the request headers, with the bearer token if we have one
+    def _headers( self, token: Optional[str] = None ) -> Dict[str, str]:
 
-            # set the auth header
-            self._auth_headers = {
-                "Authorization": f"Bearer {tokens['access']}",
-                "Content-Type": "application/json",
-                "Accept": "application/json"
-            }
+        # setup the headers
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json"
+        }
+
+        # set the auth header
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
 
-        # return the auth headers
-        return self._auth_headers
+        # return the headers
+        return headers
 
     # handle our internal exceptions
     def _exception( self, e: requests.exceptions.RequestException, error_msg: str ) -> None:
@@ -52,50 +169,127 @@ class DCHG_Main:
         # raise our custom exception
         raise APIException( error_msg ) from e
 
-    # attempt to authenticate a few times if necessary
-    def _authenticate_with_retry(self) -> Dict[str, Any]:
-        
-        # loop the number of configured retries
-        for attempt in range( self.max_retries ):
-            
-            # give it a shot
+    # ask a running sync to stop once its in-flight writes finish
+    def request_stop( self ) -> None:
+        self.stop_event.set( )
+
+    # close the pooled connections and the state store
+    def close( self ) -> None:
+        self.session.close( )
+        if self.logos:
+            self.logos.close( )
+        if self.state:
+            self.state.close( )
+
+    # work out how long to wait before the next attempt
+    def _retry_delay( self, attempt: int, response: Optional[requests.Response] = None ) -> float:
+
+        # honor the server's Retry-After if it gave us one
+        if response is not None and ( retry_after := response.headers.get( 'Retry-After' ) ):
+
+            # it's either a number of seconds...
             try:
+                return min( max( 0.0, float( retry_after ) ), self.retry_max_delay * 4 )
 
-                # return the authentication
-                return self._authenticate( )
-            
-            # whoops.. guess not this time...
-            except requests.exceptions.RequestException as e:
-                
-                # see if we're beyond the configured number of tries
-                if attempt == self.max_retries - 1:
-                    raise
+            # ... or an http date
+            except ValueError:
+                try:
+                    delay = ( parsedate_to_datetime( retry_after ) - datetime.now( timezone.utc ) ).total_seconds( )
+                    return min( max( 0.0, delay ), self.retry_max_delay * 4 )
+                except ( TypeError, ValueError ):
+                    pass
 
-                # show a message about the retry and wait a little bit...
-                print( f"Authentication failed (attempt {attempt + 1}), retrying..." )
-                time.sleep( self.retry_delay )
+        # otherwise, jittered exponential backoff
+        return random.uniform( 0, min( self.retry_max_delay, self.retry_delay * ( 2 ** attempt ) ) )
+
+    # send a request through the pooled session, retrying where it's safe to
+    def _request( self, method: str, url: str, endpoint: str, idempotent: Optional[bool] = None, auth: bool = True, **kwargs ) -> requests.Response:
+
+        # is this one safe to replay?
+        method = method.upper( )
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+
+        # hold where we're at
+        attempt = 0
+        replayed = False
 
-        # oof...  NFG, throw our exception
-        raise APIException( "Max authentication retries exceeded" )
+        # loop the number of configured retries
+        while True:
+
+            # is this our last shot?
+            final = attempt >= self.max_retries
+
+            # grab a current token for this attempt
+            token = self.tokens.access_token( ) if auth else None
 
-    # authenticate, and cache the token
-    @lru_cache( maxsize=16 )
+            # give it a shot
+            started = time.perf_counter( )
+            try:
+
+                # send it
+                response = self.session.request(
+                    method,
+                    url,
+                    headers=self._headers( token ),
+                    timeout=TIMEOUTS[endpoint],
+                    **kwargs
+                )
+                self.metrics.observe_request( endpoint, response.status_code, time.perf_counter( ) - started )
+
+            # a connect timeout never reached the server, anything else only replays if it's safe to
+            except ( requests.exceptions.ConnectTimeout, requests.exceptions.ConnectionError, requests.exceptions.Timeout ) as e:
+                self.metrics.observe_request( endpoint, type( e ).__name__, time.perf_counter( ) - started )
+                if final or not ( idempotent or isinstance( e, requests.exceptions.ConnectTimeout ) ):
+                    raise
+                delay = self._retry_delay( attempt )
+
+            # we got a response
+            else:
+
+                # the token was rejected, so renew it once and replay the request, letting go of this response's connection first
+                if response.status_code == 401 and auth and not replayed:
+                    print( f"{method} {endpoint} was unauthorized, re-authenticating..." )
+                    replayed = True
+                    self.metrics.reauth( )
+                    self.tokens.invalidate( token )
+                    response.close( )
+                    continue
+
+                # see if it's worth another go
+                retryable = response.status_code in ( RETRY_STATUSES if idempotent else THROTTLE_STATUSES )
+                if final or not retryable:
+
+                    # make sure we're setup to throw an actual error on an error status
+                    response.raise_for_status( )
+                    return response
+
+                # wait however long the server asked for, handing the connection back to the pool while we do
+                delay = self._retry_delay( attempt, response )
+                response.close( )
+
+            # show a message about the retry and wait a little bit...
+            print( f"{method} {endpoint} failed (attempt {attempt + 1}), retrying in {delay:.1f}s..." )
+            self.metrics.retry( endpoint )
+            time.sleep( delay )
+            attempt += 1
+
+    # authenticate, the token manager holds on to the tokens
     def _authenticate( self ) -> Dict[str, Any]:
         
         # give it a shot
         try:
 
             # setup the response POSTing to the API
-            response = requests.post(
+            response = self._request(
+                'POST',
                 f"{self.base_url}/api/accounts/token/",
-                json={"username": self.username, "password": self.password},
-                headers={"Content-Type": "application/json"},
-                timeout=30
+                'auth',
+                idempotent=True,
+                auth=False,
+                json={"username": self.username, "password": self.password}
             )
 
-            # make sure we're setup to throw an actual error on an error status
-            response.raise_for_status( )
-
             # return the resonse (in this case, the token)
             return response.json( )
         
@@ -103,117 +297,383 @@ class DCHG_Main:
         except requests.exceptions.RequestException as e:
             self._exception( e, "Authentication failed" )
 
-    # trigger a regresh of the M3U accounts
-    def _trigger_refresh( self ) -> None:
-        
+    # swap the refresh token for a new access token
+    def _refresh_token( self, refresh_token: str ) -> Dict[str, Any]:
+
         # give it a shot
         try:
 
-            # setup the response
-            response = requests.post(
-                f"{self.base_url}/api/m3u/refresh/",
-                headers=self.auth_headers,
-                timeout=30
+            # setup the response POSTing to the API
+            response = self._request(
+                'POST',
+                f"{self.base_url}/api/accounts/token/refresh/",
+                'auth',
+                idempotent=True,
+                auth=False,
+                json={"refresh": refresh_token}
             )
 
-            # make sure we're setup to throw an actual error on an error status
-            response.raise_for_status( )
+            # return the resonse (in this case, the new token)
+            return response.json( )
 
-            # make sure we've got a good response code
-            if response.status_code == 202:
-                return
+        # whoopsie... make sure to force the exception
+        except requests.exceptions.RequestException as e:
+            self._exception( e, "Token refresh failed" )
+
+    # trigger a regresh of the M3U accounts, either all of them or just the ones we're given
+    def _trigger_refresh( self, account_ids: Optional[Sequence[int]] = None ) -> None:
+        
+        # give it a shot
+        try:
+
+            # loop over what we're refreshing
+            for path in ( [f"/api/m3u/refresh/{account_id}/" for account_id in account_ids] if account_ids else ["/api/m3u/refresh/"] ):
+
+                # setup the response
+                self._request(
+                    'POST',
+                    f"{self.base_url}{path}",
+                    'refresh',
+                    idempotent=True
+                )
             
         # whoopsie...
         except requests.exceptions.RequestException as e:
             self._exception( e, "Refresh failed" )
 
-    # get all the streams
-    def _get_streams( self ) -> List[Dict[str, Any]]:
-        
-        # if we're set to refresh, let's do that first
-        if self.refresh:
+    # get the M3U accounts
+    def _get_m3u_accounts( self ) -> List[Dict[str, Any]]:
 
-            # trigger a refresh of the M3U accounts
-            print( "Triggering M3U account refresh..." )
-            self._trigger_refresh( )
+        # pull every page
+        return list( self._paginate( "/api/m3u/accounts/", 'accounts', "Failed to fetch M3U accounts" ) )
 
-            # wait a little bit for it to finish
-            print( "Waiting for M3U refresh to complete..." )
-            time.sleep( 10 )
-            print( "M3U refresh complete, fetching streams..." )
+    # refresh the M3U accounts, and wait until they've actually finished
+    def _refresh_and_wait( self ) -> float:
 
-        # give it a shot
+        # snapshot where the accounts are now, so we can tell when they've moved on
+        started = time.monotonic( )
+        before = {
+            account['id']: account.get( 'updated_at' ) for account in self._get_m3u_accounts( )
+            if account.get( 'is_active', True ) and account.get( 'status' ) not in REFRESH_SKIP
+            and ( not self.refresh_accounts or account['id'] in self.refresh_accounts )
+        }
+
+        # trigger the refresh
+        print( "Triggering M3U account refresh..." )
+        self._trigger_refresh( self.refresh_accounts )
+        print( f"Waiting for {len( before )} M3U accounts to finish refreshing..." )
+
+        # hold the accounts still going, the ones we've seen working, and how long to wait between looks
+        pending = set( before )
+        seen_busy = set( )
+        delay = 1.0
+
+        # poll until they're all done or we run out of time
+        while pending:
+
+            # give up at the deadline, and sync with what's there
+            elapsed = time.monotonic( ) - started
+            if elapsed >= self.refresh_timeout:
+                print( f"M3U refresh still running on {len( pending )} accounts after {elapsed:.1f}s, fetching streams anyway..." )
+                return elapsed
+
+            # wait a little, backing off as we go, but never past the deadline
+            time.sleep( min( delay, self.refresh_timeout - elapsed ) )
+            delay = min( delay * 1.5, 15.0 )
+
+            # see where they're at
+            for account in self._get_m3u_accounts( ):
+
+                # skip what we're not waiting on
+                if account.get( 'id' ) not in pending:
+                    continue
+
+                # still going
+                if account.get( 'status' ) in REFRESH_BUSY:
+                    seen_busy.add( account['id'] )
+                    continue
+
+                # it's finished if it has been busy, or was updated since we started
+                if account['id'] in seen_busy or account.get( 'updated_at' ) != before[account['id']]:
+                    pending.discard( account['id'] )
+
+        # return how long we waited
+        elapsed = time.monotonic( ) - started
+        print( f"M3U refresh complete after {elapsed:.1f}s, fetching streams..." )
+        return elapsed
+
+    # open a page, parsing the body as it arrives rather than loading it all up front
+    def _open_page( self, url: str, endpoint: str, params: Optional[Dict[str, Any]] = None, fields: Optional[Sequence[str]] = None ) -> Tuple[requests.Response, JSONStream]:
+
+        # setup the response from the API, without reading the body yet
+        response = self._request( 'GET', url, endpoint, params=params, stream=True )
+
+        # return it, and the parser over it
+        return response, JSONStream( response.iter_content( chunk_size=CHUNK_SIZE ), fields=fields )
+
+    # hand off a page's records as they're parsed, fetching it again if the body gets cut off... returns the page and how many records it had
+    def _stream_page( self, url: str, endpoint: str, params: Optional[Dict[str, Any]] = None, fields: Optional[Sequence[str]] = None ) -> Generator[Dict[str, Any], None, Tuple[JSONStream, int]]:
+
+        # hold how many records we've handed off, and where we're at
+        handed = 0
+        attempt = 0
+
+        # loop until we get through the whole page
+        while True:
+
+            # open it, the request itself already retries until the headers are in
+            response, page = self._open_page( url, endpoint, params, fields )
+
+            # give it a shot, skipping whatever an attempt that got cut off already handed off
+            try:
+                with response:
+                    for position, record in enumerate( page ):
+                        if position >= handed:
+                            handed += 1
+                            yield record
+
+                # return the page, for what came with the records
+                return page, handed
+
+            # the body got cut off part way, which is most of the time on a big listing, so read it again if we have tries left
+            except BODY_ERRORS as e:
+                self.metrics.observe_request( endpoint, type( e ).__name__, 0.0 )
+                if attempt >= self.max_retries:
+                    raise
+
+                # show a message about the retry and wait a little bit...
+                delay = self._retry_delay( attempt )
+                print( f"GET {endpoint} was cut off after {handed} records (attempt {attempt + 1}), retrying in {delay:.1f}s..." )
+                self.metrics.retry( endpoint )
+                time.sleep( delay )
+                attempt += 1
+
+    # fetch a whole page, for when it has to be read ahead of being handed off
+    def _fetch_page( self, url: str, endpoint: str, params: Optional[Dict[str, Any]] = None, fields: Optional[Sequence[str]] = None ) -> Any:
+
+        # parse the page, keeping only what we need of each record... it's all buffered, so a cut off read just starts the page over
+        records = []
+        reader = self._stream_page( url, endpoint, params, fields )
         try:
+            while True:
+                records.append( next( reader ) )
+        except StopIteration as done:
+            page, _ = done.value
 
-            # setup the response from the API
-            response = requests.get(
-                f"{self.base_url}/api/channels/streams/?page_size=2500", # for me, this is big enough to get them all
-                headers=self.auth_headers,
-                timeout=30
-            )
+        # return it in the shape the API sent it
+        return records if page.is_list else { **page.meta, 'results': records }
 
-            # make sure we're setup to throw an actual error on an error status
-            response.raise_for_status( )
+    # walk a paginated listing, yielding each record as soon as it's parsed
+    def _paginate( self, path: str, endpoint: str, error_msg: str, fields: Optional[Sequence[str]] = None, params: Optional[Dict[str, Any]] = None ) -> Iterator[Dict[str, Any]]:
 
-            # hold the data
-            data = response.json( )
+        # hold the listing url
+        url = f"{self.base_url}{path}"
+
+        # give it a shot
+        try:
+
+            # the first page tells us how many records there are in total, hand them off as they're parsed
+            page, first = yield from self._stream_page( url, endpoint, { **( params or {} ), 'page': 1, 'page_size': self.page_size }, fields )
+
+            # some listings are not paginated at all, they just return the list
+            if page.is_list:
+                return
 
             # if we don't have results in the data
-            if 'results' not in data:
+            if not page.found:
                 raise ValueError( "API response missing 'results' field" )
-            
-            # return the results
-            return data['results']
-        
+
+            # no prefetching, or no count to plan with, so just follow the next links
+            data = page.meta
+            if self.prefetch < 2 or not data.get( 'count' ) or not first:
+
+                # loop while there's another page
+                next_url = data.get( 'next' )
+                while next_url:
+
+                    # grab it, hand off its records, and move along
+                    page, _ = yield from self._stream_page( next_url, endpoint, fields=fields )
+                    next_url = page.meta.get( 'next' )
+                return
+
+            # the server may cap the page size, so go by what it actually sent us
+            page_size = first
+            pages = math.ceil( data['count'] / page_size )
+
+            # fetch the remaining pages a few at a time, yielding them in order
+            with ThreadPoolExecutor( max_workers=self.prefetch, initializer=inherit_prefix( ) ) as pool:
+
+                # hold the in-flight pages
+                pending = deque( )
+                next_page = 2
+
+                # loop until every page is requested and handed off
+                while next_page <= pages or pending:
+
+                    # keep the prefetch window full
+                    while next_page <= pages and len( pending ) < self.prefetch:
+                        pending.append( pool.submit( self._fetch_page, url, endpoint, { **( params or {} ), 'page': next_page, 'page_size': page_size }, fields ) )
+                        next_page += 1
+
+                    # hand off the oldest page
+                    yield from pending.popleft( ).result( ).get( 'results', [] )
+
         # whoopsie...
         except requests.exceptions.RequestException as e:
-            self._exception( e, "Failed to fetch streams" )
+            self._exception( e, error_msg )
 
-    # get all our channels if any exist
-    def _get_channels( self ) -> List[Dict[str, Any]]:
+    # time how long we spend waiting on an iterator, so fetching and grouping can be told apart
+    def _timed( self, records: Iterable[Dict[str, Any]], phase: str ) -> Iterator[Dict[str, Any]]:
+
+        # start the clock on every pull
+        records = iter( records )
+        while True:
+            started = time.perf_counter( )
+            try:
+                record = next( records )
+            except StopIteration:
+                return
+            finally:
+                self.metrics.add_time( phase, time.perf_counter( ) - started )
+            yield record
+
+    # get all the streams
+    def _get_streams( self ) -> Iterator[Dict[str, Any]]:
+
+        # work out the scope first, a scoped refresh only refreshes the accounts in it
+        scope = self._resolve_scope( ) if self.scoped else None
         
-        # let's give it a shot
+        # if we're set to refresh, let's do that first, and wait for it to finish
+        if self.refresh:
+            with self.metrics.phase( 'refresh_wait' ):
+                self._refresh_and_wait( )
+
+        # stream the records page by page
+        if scope:
+            return self._scoped_streams( *scope, self.stream_fields )
+        return self._paginate( "/api/channels/streams/", 'streams', "Failed to fetch streams", self.stream_fields )
+
+    # get the channel groups
+    def _get_channel_groups( self ) -> List[Dict[str, Any]]:
+
+        # pull every page
+        return list( self._paginate( "/api/channels/groups/", 'channels', "Failed to fetch channel groups" ) )
+
+    # match the scope we were given, by id or name, against what the server has
+    def _match_scope( self, values: Sequence[Union[int, str]], known: Dict[int, str], kind: str ) -> Dict[int, str]:
+
+        # hold the matches, and the ids by lowercased name
+        matched: Dict[int, str] = {}
+        by_name = { str( name ).casefold( ): record_id for record_id, name in known.items( ) }
+
+        # loop over what we were given
+        for value in values:
+
+            # an id we know, or a name we know
+            value = str( value ).strip( )
+            record_id = int( value ) if value.isdigit( ) and int( value ) in known else by_name.get( value.casefold( ) )
+            if record_id is None:
+                raise ValueError( f"Unknown {kind} '{value}'" )
+            matched[record_id] = known[record_id]
+
+        # return them
+        return matched
+
+    # resolve the accounts and channel groups we're scoped to, id -> name
+    def _resolve_scope( self ) -> Tuple[Optional[Dict[int, str]], Optional[Dict[int, str]]]:
+
+        # hold them
+        accounts = groups = None
+
+        # the accounts, which are also the only ones worth refreshing
+        if self.scope_accounts:
+            accounts = self._match_scope( self.scope_accounts, { account['id']: account.get( 'name' ) for account in self._get_m3u_accounts( ) }, 'M3U account' )
+            self.refresh_accounts = sorted( accounts )
+
+        # the channel groups
+        if self.scope_groups:
+            groups = self._match_scope( self.scope_groups, { group['id']: group.get( 'name' ) for group in self._get_channel_groups( ) }, 'channel group' )
+
+        # show what we're limited to
+        print( "Scoped to " + ' and '.join( f"{kind} {', '.join( map( str, scope.values( ) ) )}" for kind, scope in ( ( 'M3U accounts', accounts ), ( 'channel groups', groups ) ) if scope ) )
+
+        # return them
+        return accounts, groups
+
+    # the streams in scope, letting the server filter what it can and making sure of it ourselves
+    def _scoped_streams( self, accounts: Optional[Dict[int, str]], groups: Optional[Dict[int, str]], fields: Sequence[str] ) -> Iterator[Dict[str, Any]]:
+
+        # one listing per account, since an account's streams keep their order within its own listing... an account's
+        # streams span groups though, so only a single group can be left to the server, otherwise we filter the lot
+        if accounts:
+            filters = [{ 'm3u_account': account_id } for account_id in accounts]
+        elif len( groups ) == 1:
+            filters = [{ 'channel_group_name': name } for name in groups.values( )]
+        else:
+            filters = [{}]
+
+        # start with nothing in scope
+        self.scope_ids = set( )
+
+        # loop over the listings
+        for params in filters:
+            for stream in self._paginate( "/api/channels/streams/", 'streams', "Failed to fetch streams", fields, params ):
+
+                # the api may not know the filter, or match more loosely than we do
+                if accounts and stream.get( 'm3u_account' ) not in accounts:
+                    continue
+                if groups and stream.get( 'channel_group' ) not in groups:
+                    continue
+
+                # the same stream can turn up in more than one listing
+                if stream.get( 'id' ) in self.scope_ids:
+                    continue
+                self.scope_ids.add( stream.get( 'id' ) )
+
+                # hand it off
+                yield stream
+
+    # get the logos the server has, url -> id
+    def _get_logos( self ) -> Dict[str, int]:
+
+        # pull every page
+        return { logo['url']: logo['id'] for logo in self._paginate( "/api/channels/logos/", 'logos', "Failed to fetch logos" ) if logo.get( 'url' ) and logo.get( 'id' ) }
+
+    # register a logo on the server, returning its id
+    def _create_logo( self, name: str, url: str ) -> Optional[int]:
+
+        # give it a shot
         try:
 
-            # hold the response
-            response = requests.get(
-                f"{self.base_url}/api/channels/channels/?page_size=2500",
-                headers=self.auth_headers,
-                timeout=30
-            )
+            # setup the response
+            response = self._request( 'POST', f"{self.base_url}/api/channels/logos/", 'logos', json={ 'name': name, 'url': url } )
 
-            # make sure we're setup to throw an actual error on an error status
-            response.raise_for_status( )
+            # return the new id
+            return response.json( ).get( 'id' )
 
-            # return the json response
-            return response.json( )
-        
         # whoopsie...
         except requests.exceptions.RequestException as e:
-            self._exception( e, "Failed to fetch channels" )
+            self._exception( e, f"Failed to register logo {name}" )
+
+    # get all our channels if any exist
+    def _get_channels( self ) -> List[Dict[str, Any]]:
+        
+        # pull every page, we need them all for the lookups
+        return list( self._paginate( "/api/channels/channels/", 'channels', "Failed to fetch channels" ) )
 
     # normalize channel names
     def _normalize_channel_name(self, name: str) -> str:
 
-        # make sure the normalizer argument is a valid regex string
-        try:
-            # Test if the pattern compiles (this checks if it's a valid regex)
-            compiled = re.compile( self.normalizer )
-            
-            # If it compiles, perform the replacement
-            return compiled.sub( "", name )
-        
-        # whoops...
-        except re.error:
-
-            # If it's not a valid regex, return the original text
-            return name
+        # the rules were compiled and validated up front, and the results are memoized
+        return self.normalizer.normalize( name )
 
     # group and sort the streams
-    def _group_and_sort_streams( self, streams: List[Dict[str, Any]] ) -> Dict[str, List[Dict[str, Any]]]:
+    def _group_and_sort_streams( self, streams: Iterable[Dict[str, Any]] ) -> Dict[str, StreamGroup]:
         
-        # setup the channel groups
-        channel_groups: DefaultDict[str, List[Dict[str, Any]]] = defaultdict( list )
+        # setup the stream table, the channel groups as its rows keyed on the folded name, and the name each one shows as
+        table = StreamTable( )
+        channel_groups: DefaultDict[str, List[int]] = defaultdict( list )
+        channel_names: Dict[str, str] = {}
         
         # loop over teh streams
         for stream in streams:
@@ -222,56 +682,315 @@ class DCHG_Main:
             if not isinstance( stream, dict ) or 'id' not in stream or 'name' not in stream:
                 continue
 
-            # normalize the stream name
-            stream_name = self._normalize_channel_name( stream['name'] )
+            # normalize the stream name, skipping anything the rules emptied out
+            group_key = self.normalizer.key( stream['name'] )
+            if not group_key:
+                continue
+
+            # the first name we see for a group is the one it shows as
+            if group_key not in channel_names:
+                channel_names[group_key] = self._normalize_channel_name( stream['name'] )
                 
             # setup the grouped channels streams
-            channel_groups[stream_name].append( {
-                'id': stream['id'],
-                'logo_url': stream.get( 'logo_url', 'https://cdn.kevp.us/tv/kptv-icon.png' ),
-                'tvg_id': stream.get( 'tvg_id' ),
-                'channel_group': stream.get( 'channel_group' ),
-                'm3u_account': stream.get( 'm3u_account' ),
-            } )
+            channel_groups[group_key].append( table.add( stream ) )
+
+        # fold the near-duplicates together if we're set to
+        if self.fuzzy:
+            channel_groups = self._merge_fuzzy_groups( channel_groups, channel_names )
 
-        # return the sorted (by the account name)
+        # return the sorted (by the account)
         return {
-            name: sorted( group, key=lambda x: x['m3u_account'] )
-            for name, group in channel_groups.items( )
+            channel_names[key]: StreamGroup( table, table.sort( rows ) )
+            for key, rows in channel_groups.items( )
         }
 
-    # find the channel id by name if it exists
-    def _find_channel_id( self, channels: List[Dict[str, Any]], channel_name: str ) -> Optional[int]:
-        
-        # return the channel id
-        return next(
-            ( item.get( "id" ) for item in ( channels or [] ) 
-             if item.get( "name" ) == channel_name ),
-            None
+    # merge groups whose names are near-duplicates, under a canonical name per cluster
+    def _merge_fuzzy_groups( self, channel_groups: Dict[str, List[int]], channel_names: Dict[str, str] ) -> Dict[str, List[int]]:
+
+        # cluster the group keys, then gather the members of each cluster
+        clusters: DefaultDict[str, List[str]] = defaultdict( list )
+        for key, root in self.fuzzy.cluster( channel_groups ).items( ):
+            clusters[root].append( key )
+
+        # hold the merged groups
+        merged: Dict[str, List[int]] = {}
+
+        # loop over the clusters
+        for members in clusters.values( ):
+
+            # the canonical name is the one with the most streams, then the shortest
+            canonical = min( members, key=lambda key: ( -len( channel_groups[key] ), len( channel_names[key] ), channel_names[key] ) )
+            merged[canonical] = [row for key in members for row in channel_groups[key]]
+
+            # report what got folded together
+            if len( members ) > 1 and not self.quiet:
+                others = ', '.join( sorted( channel_names[key] for key in members if key != canonical ) )
+                print( f"Fuzzy grouped: {channel_names[canonical]} <- {others}" )
+
+        # show the totals
+        print( f"Fuzzy grouping merged {len( channel_groups )} names into {len( merged )} channels" )
+
+        # return the merged groups
+        return merged
+
+    # put the quickest responding streams first in each group, keeping the account order between equals
+    def _rank_by_probes( self, channel_groups: Dict[str, StreamGroup] ) -> Dict[str, StreamGroup]:
+
+        # only groups with more than one stream have a failover order to pick
+        urls = { url for streams in channel_groups.values( ) if len( streams ) > 1 for url in streams.values( 'url' ) if url }
+        if not urls:
+            return channel_groups
+
+        # the account each url belongs to, and how many connections each account allows, so we don't go over it
+        accounts = {}
+        for streams in channel_groups.values( ):
+            if len( streams ) > 1:
+                accounts.update( zip( streams.values( 'url' ), streams.values( 'm3u_account' ) ) )
+        limits = self._account_limits( )
+
+        # probe them
+        print( f"Probing {len( urls )} stream URLs..." )
+        results = self.prober.probe_all( urls, self.stop_event, accounts, limits )
+        dead = sum( 1 for result in results.values( ) if result['ok'] is False )
+        refused = sum( 1 for result in results.values( ) if result['ok'] is None )
+        print( f"Probed {self.prober.probed} streams ({self.prober.cached} cached): {len( results ) - dead - refused} responding, {refused} turned away, {dead} failed" )
+
+        # loop over the groups and reorder them
+        for streams in channel_groups.values( ):
+            if len( streams ) > 1:
+                url = streams.table.columns['url']
+                streams.rows = sorted( streams.rows, key=lambda row: self.prober.rank( results.get( url[row] ) ) )
+
+        # return the groups
+        return channel_groups
+
+    # how many connections each M3U account allows, leaving the prober to its defaults if we can't find out
+    def _account_limits( self ) -> Dict[int, int]:
+
+        # give it a shot
+        try:
+            return { account['id']: account.get( 'max_streams' ) or 0 for account in self._get_m3u_accounts( ) if isinstance( account, dict ) and 'id' in account }
+
+        # whoopsie... probing still works, just at the default per provider
+        except APIException as e:
+            print( f"Couldn't read the M3U account connection limits, probing {self.prober.connections} at a time per provider: {e}" )
+            return {}
+
+    # map every group's logo to the server's logo id, each distinct logo only the once
+    def _resolve_logos( self, channel_groups: Dict[str, StreamGroup] ) -> None:
+
+        # the logo each channel would get
+        urls = { self._get_first_valid( streams, 'logo_url' ) for streams in channel_groups.values( ) } - { None }
+        if not urls:
+            return
+
+        # work them out
+        ids = self.logos.resolve( urls, self.stop_event )
+        print( f"Logos: {len( urls )} distinct, {self.logos.checked} checked ({self.logos.changed} new or changed), {self.logos.registered} registered, {sum( 1 for logo_id in ids.values( ) if logo_id is None )} unavailable" )
+
+    # load the existing channels into the lookup indexes
+    def _index_channels( self, channels: Iterable[Dict[str, Any]] ) -> ChannelIndex:
+
+        # return the index
+        return ChannelIndex( channels, self.normalizer.key, self.match_order )
+
+    # build the channel payload we send for a group of streams
+    def _channel_payload( self, channel_name: str, streams: StreamGroup, keep: Optional[Dict[str, Any]] = None ) -> Dict[str, Any]:
+
+        # setup the payload
+        payload = {
+            'name': channel_name,
+            'streams': streams.ids,
+            'tvg_id': self._get_first_valid( streams, 'tvg_id' ),
+            'channel_group_id': self._get_first_valid( streams, 'channel_group' ),
+        }
+
+        # the logo, if we're syncing them and know it... one we couldn't get leaves the channel's alone
+        logo_id = self.logos.id_for( self._get_first_valid( streams, 'logo_url' ) ) if self.logos else None
+        if logo_id is not None:
+            payload['logo_id'] = logo_id
+
+        # return it, with anything we're keeping from the existing channel
+        return { **payload, **( keep or {} ) }
+
+    # the stream ids on an existing channel, the api may hand back stream ids or nested stream records
+    def _current_streams( self, channel: Dict[str, Any] ) -> List[int]:
+        return [
+            stream.get( 'id' ) if isinstance( stream, dict ) else stream
+            for stream in ( channel.get( 'streams' ) or [] )
+        ]
+
+    # a scoped sync leaves the streams it didn't look at where they are, filling the slots ours had
+    def _merge_scoped_streams( self, channel: Dict[str, Any], stream_ids: List[int] ) -> List[int]:
+
+        # hold the merged streams, and ours in the order they go in
+        merged: List[int] = []
+        ours = iter( stream_ids )
+        last = 0
+
+        # loop over what's there now, swapping ours into the slots ours had
+        for stream_id in self._current_streams( channel ):
+            if stream_id not in self.scope_ids:
+                merged.append( stream_id )
+                continue
+            replacement = next( ours, None )
+            if replacement is not None:
+                merged.append( replacement )
+                last = len( merged )
+
+        # anything of ours left over goes after the last of them, or on the end if there weren't any
+        rest = list( ours )
+        if not last:
+            last = len( merged )
+        return merged[:last] + rest + merged[last:]
+
+    # what a scoped sync keeps from an existing channel: the streams it didn't look at, its name, and its tvg id and group if it has them
+    def _scoped_keep( self, channel: Dict[str, Any], streams: StreamGroup ) -> Dict[str, Any]:
+
+        # the group may come back under either key
+        group = channel.get( 'channel_group_id', channel.get( 'channel_group' ) )
+        if isinstance( group, dict ):
+            group = group.get( 'id' )
+
+        # hold the streams, and the name, since we only saw some of the names its streams go by
+        keep: Dict[str, Any] = { 'name': channel.get( 'name' ), 'streams': self._merge_scoped_streams( channel, streams.ids ) }
+
+        # only the ones that are set
+        if channel.get( 'tvg_id' ):
+            keep['tvg_id'] = channel['tvg_id']
+        if group is not None:
+            keep['channel_group_id'] = group
+        if ( logo := self._current_logo( channel ) ) is not None:
+            keep['logo_id'] = logo
+
+        # return it
+        return keep
+
+    # the logo id on an existing channel, which may come back under either key too
+    def _current_logo( self, channel: Dict[str, Any] ) -> Optional[int]:
+        logo = channel.get( 'logo_id', channel.get( 'logo' ) )
+        return logo.get( 'id' ) if isinstance( logo, dict ) else logo
+
+    # see if an existing channel already matches the payload we would send
+    def _channel_matches( self, channel: Dict[str, Any], payload: Dict[str, Any] ) -> bool:
+
+        # grab what it has
+        current_streams = self._current_streams( channel )
+
+        # the group may come back under either key
+        current_group = channel.get( 'channel_group_id', channel.get( 'channel_group' ) )
+        if isinstance( current_group, dict ):
+            current_group = current_group.get( 'id' )
+
+        # return if everything lines up, stream order included
+        return (
+            channel.get( 'name' ) == payload['name']
+            and current_streams == payload['streams']
+            and ( channel.get( 'tvg_id' ) or None ) == ( payload['tvg_id'] or None )
+            and current_group == payload['channel_group_id']
+            and ( 'logo_id' not in payload or self._current_logo( channel ) == payload['logo_id'] )
         )
 
+    # reconcile the computed groups against the existing channels
+    def _plan_channels( self, channel_groups: Dict[str, StreamGroup], index: ChannelIndex, claimed: Optional[Set[int]] = None ) -> Tuple[List[Dict[str, Any]], Dict[str, Optional[int]]]:
+
+        # hold the operations and the groups that need nothing
+        operations = []
+        unchanged = {}
+
+        # a scoped sync only sees some of the groups, so a channel holding streams it didn't look at belongs to the group those go by... only its exact
+        # name can take it, like a full run would
+        reserved = { channel.get( 'id' ) for channel in index if any( stream_id not in self.scope_ids for stream_id in self._current_streams( channel ) ) } if self.scoped else None
+
+        # grab the existing channels for every group up front, so two groups never land on the same one and the best match always wins
+        matches = index.find_all( [( channel_name, self._get_first_valid( streams, 'tvg_id' ) ) for channel_name, streams in channel_groups.items( )], claimed, reserved )
+
+        # loop over the channel groups
+        for ( channel_name, streams ), channel in zip( channel_groups.items( ), matches ):
+
+            # a scoped sync keeps what it didn't look at, a channel holding only streams it looked at is all ours though
+            keep = self._scoped_keep( channel, streams ) if channel and reserved and channel.get( 'id' ) in reserved else None
+
+            # it exists and is already correct, nothing to write
+            payload = self._channel_payload( channel_name, streams, keep )
+            if channel and self._channel_matches( channel, payload ):
+                unchanged[channel_name] = channel.get( 'id' )
+                continue
+
+            # otherwise queue up the write, with how many streams it adds or drops
+            operations.append( {
+                'action': 'update' if channel else 'create',
+                'channel_id': channel.get( 'id' ) if channel else None,
+                'name': channel_name,
+                'streams': streams,
+                'keep': keep,
+                'change': len( set( self._current_streams( channel ) if channel else ( ) ) ^ set( payload['streams'] ) ),
+            } )
+
+        # a scoped sync also takes its streams back out of the channels none of its groups map to any more, as a full run would
+        if self.scoped:
+            operations.extend( self._scoped_leftovers( index, { channel.get( 'id' ) for channel in matches if channel } | set( claimed or ( ) ), reserved ) )
+
+        # return the plan
+        return operations, unchanged
+
+    # the channels still holding streams in scope that none of the scoped groups map to, with those streams taken out
+    def _scoped_leftovers( self, index: ChannelIndex, taken: Set[int], reserved: Set[int] ) -> List[Dict[str, Any]]:
+
+        # hold the operations, and an empty group for the streams we're putting back in
+        operations = []
+        none = self._journal_streams( [] )
+
+        # loop over the channels some other group has, that hold streams of ours
+        for channel in index:
+            current = self._current_streams( channel )
+            if channel.get( 'id' ) in taken or channel.get( 'id' ) not in reserved or all( stream_id not in self.scope_ids for stream_id in current ):
+                continue
+
+            # leave it with just the streams we didn't look at
+            keep = self._scoped_keep( channel, none )
+            operations.append( {
+                'action': 'update',
+                'channel_id': channel.get( 'id' ),
+                'name': channel.get( 'name' ),
+                'streams': none,
+                'keep': keep,
+                'change': len( current ) - len( keep['streams'] ),
+            } )
+
+        # return them
+        return operations
+
+    # hash everything we would send for a group, so we can tell when it changes
+    def _group_hash( self, channel_name: str, streams: StreamGroup ) -> str:
+
+        # return the hash
+        return hashlib.sha1( json.dumps( self._channel_payload( channel_name, streams ), sort_keys=True ).encode( ) ).hexdigest( )
+
+    # show the plan without running it
+    def _print_plan( self, batches: List[List[Dict[str, Any]]] ) -> None:
+
+        # loop over the operations and show what would happen
+        for operation in ( operation for batch in batches for operation in batch ):
+            if operation['action'] == 'update':
+                print( f"Would update channel: {operation['name']} (#{operation['channel_id']}, {len( operation['streams'] )} Streams, {operation.get( 'change', 0 )} added or dropped)" )
+            else:
+                print( f"Would create channel: {operation['name']} ({len( operation['streams'] )} Streams)" )
+
     # update an existing data with new stream dat
-    def _update_channel( self, channel_id: int, channel_name: str, streams: List[Dict[str, Any]] ) -> Optional[Dict[str, Any]]:
+    def _update_channel( self, channel_id: int, channel_name: str, streams: StreamGroup, keep: Optional[Dict[str, Any]] = None ) -> Optional[Dict[str, Any]]:
         
         # give it a shot
         try:
 
             # setup the response
-            response = requests.put(
+            response = self._request(
+                'PUT',
                 f"{self.base_url}/api/channels/channels/{channel_id}/",
-                json={
-                    'name': channel_name,
-                    'streams': [stream['id'] for stream in streams],
-                    'tvg_id': self._get_first_valid( streams, 'tvg_id' ),
-                    'channel_group_id': self._get_first_valid( streams, 'channel_group' )
-                },
-                headers=self.auth_headers,
-                timeout=30
+                'write',
+                json=self._channel_payload( channel_name, streams, keep )
             )
 
-            # make sure we're setup to throw an actual error on an error status
-            response.raise_for_status( )
-
             # return the json response
             return response.json( )
         
@@ -280,7 +999,7 @@ class DCHG_Main:
             self._exception( e, f"Failed to update channel {channel_name}" )
 
     # create a new channel with all streams necessary
-    def _create_channel( self, channel_name: str, streams: List[Dict[str, Any]] ) -> Optional[Dict[str, Any]]:
+    def _create_channel( self, channel_name: str, streams: StreamGroup, keep: Optional[Dict[str, Any]] = None ) -> Optional[Dict[str, Any]]:
         
         # give it a shot
         try:
@@ -293,20 +1012,41 @@ class DCHG_Main:
                 print(f"Could Not Create Channel: {channel_name} (no valid stream ID)")
                 return None
 
+            # create it with everything in one go, unless we already know this server can't
+            if self.direct_create is not False:
+                try:
+
+                    # setup the response
+                    response = self._request(
+                        'POST',
+                        f"{self.base_url}/api/channels/channels/",
+                        'write',
+                        json=self._channel_payload( channel_name, streams, keep )
+                    )
+
+                    # it works here, so keep doing it, and return the json response
+                    self.direct_create = True
+                    return response.json( )
+
+                # only fall back if it has never worked here, otherwise it's this channel that's the problem
+                except requests.exceptions.HTTPError as e:
+                    if self.direct_create or e.response is None or e.response.status_code not in UNSUPPORTED_STATUSES:
+                        raise
+                    if self.direct_create is None:
+                        print( f"Creating channels directly isn't supported ({e.response.status_code}), creating from a stream and then updating instead" )
+                    self.direct_create = False
+
             # Create channel from initial stream
-            response = requests.post(
+            response = self._request(
+                'POST',
                 f"{self.base_url}/api/channels/channels/from-stream/",
+                'write',
                 json={
                     'name': channel_name,
                     'stream_id': initial_stream_id
-                },
-                headers=self.auth_headers,
-                timeout=30
+                }
             )
 
-            # make sure we're setup to throw an actual error on an error status
-            response.raise_for_status( )
-
             # grab the channel data
             channel_data = response.json( )
 
@@ -314,7 +1054,7 @@ class DCHG_Main:
             if channel_id := channel_data.get( 'id' ):
 
                 # grab the update results and return the results
-                update_result = self._update_channel( channel_id, channel_name, streams )
+                update_result = self._update_channel( channel_id, channel_name, streams, keep )
                 return update_result if update_result else channel_data
 
             # return the channel data    
@@ -324,69 +1064,515 @@ class DCHG_Main:
         except requests.exceptions.RequestException as e:
             self._exception( e, f"Failed to create channel {channel_name}" )
 
-    # get the first valid item
-    def _get_first_valid( self, items: List[Dict[str, Any]], key: str ) -> Any:
+    # get the first valid value of a stream field
+    def _get_first_valid( self, streams: StreamGroup, key: str ) -> Any:
         
         # return it
-        return next( ( item[key] for item in items if item.get( key ) not in [None, ''] ), None )
+        return streams.first_valid( key )
 
     # log/show the action taken
-    def _log_channel_action( self, channel_name: str, streams: List[Dict[str, Any]], exists: bool = False ) -> None:
+    def _log_channel_action( self, channel_name: str, streams: StreamGroup, exists: bool = False ) -> None:
+
+        # count it
+        self.metrics.count( 'updated' if exists else 'created' )
+
+        # printing thousands of these adds up, so not when we're quiet
+        if self.quiet:
+            return
         
         # what action is taken... then print it
         action = "Updated" if exists else "Created"
         print( f"{action} channel: {channel_name}" )
         print( f"{len(streams)} Streams" )
 
-    # run the channel creator/updater
-    def create_channels( self ) -> List[Dict[str, Any]]:
+    # see if the server takes channel updates in bulk, only asking the once
+    def _probe_bulk_updates( self ) -> bool:
+
+        # we already know
+        if self.bulk_updates is not None:
+            return self.bulk_updates
+
+        # give it a shot, anything but a clear yes means no
+        try:
+            response = self._request( 'OPTIONS', f"{self.base_url}{BULK_UPDATE_PATH}", 'write' )
+            allowed = { method.strip( ).upper( ) for method in response.headers.get( 'Allow', '' ).split( ',' ) }
+            self.bulk_updates = 'PATCH' in allowed
+
+        # whoopsie... so no bulk
+        except requests.exceptions.RequestException:
+            self.bulk_updates = False
+
+        # return it
+        return self.bulk_updates
+
+    # update several existing channels in a single request
+    def _update_channels_bulk( self, operations: List[Dict[str, Any]] ) -> List[Dict[str, Any]]:
+
+        # build up the payloads
+        payloads = [{ 'id': operation['channel_id'], **self._channel_payload( operation['name'], operation['streams'], operation.get( 'keep' ) ) } for operation in operations]
 
         # give it a shot
         try:
 
-            # grab all streams first
-            print( "Fetching streams..." )
-            streams = self._get_streams( )
-            print( f"Found {len(streams)} streams" )
-            
-            # grab all existing streams
-            print( "Fetching channels..." )
-            channels = self._get_channels( )
-            print( f"Found {len(channels)} channels" )
+            # setup the response
+            response = self._request( 'PATCH', f"{self.base_url}{BULK_UPDATE_PATH}", 'write', json=payloads )
 
-            # setup and hold the grouped/sorted channels
-            channel_groups = self._group_and_sort_streams( streams )
+        # whoopsie...
+        except requests.exceptions.RequestException as e:
+            self._exception( e, f"Failed to update {len( operations )} channels in bulk" )
 
-            # hold the results
-            results = []
+        # the server may hand back the channels, or just tell us it worked
+        try:
+            data = response.json( )
+        except ValueError:
+            data = None
+        returned = { channel.get( 'id' ): channel for channel in data if isinstance( channel, dict ) } if isinstance( data, list ) else {}
+
+        # return a result per operation, in order
+        return [returned.get( payload['id'], payload ) for payload in payloads]
+
+    # the order an operation goes out in: new channels, then the biggest change to the streams, then pinned, then the biggest group
+    def _priority( self, operation: Dict[str, Any] ) -> Tuple[bool, int, bool, int]:
+        return (
+            operation['action'] != 'create',
+            -operation.get( 'change', len( operation['streams'] ) ),
+            self.normalizer.key( operation['name'] ).casefold( ) not in self.pins,
+            -len( operation['streams'] ),
+        )
 
-            # loop over the channel groups
-            for channel_name, streams in channel_groups.items( ):
+    # compile the plan into the fewest requests: drop repeated targets, and batch the updates when we can
+    def _compile_plan( self, operations: List[Dict[str, Any]] ) -> List[List[Dict[str, Any]]]:
 
-                # grab a channel id
-                channel_id = self._find_channel_id( channels, channel_name )
-                
-                # if we have it
-                if channel_id:
+        # hold the batches, the pending updates, and what we've already targeted
+        batches: List[List[Dict[str, Any]]] = []
+        updates: List[Dict[str, Any]] = []
+        targets: Set[Tuple[str, Any]] = set( )
 
-                    # update the channel
-                    result = self._update_channel( channel_id, channel_name, streams )
-                
-                # otherwise
-                else:
+        # loop over the operations, the most valuable first so they land before any time budget runs out
+        for operation in sorted( operations, key=self._priority ):
+
+            # the same channel only gets written once, the first operation for it wins
+            target = ( 'update', operation['channel_id'] ) if operation['action'] == 'update' else ( 'create', operation['name'] )
+            if target in targets:
+                operation['status'] = 'skipped'
+                print( f"Skipping repeated {operation['action']} of channel: {operation['name']}" )
+                continue
+            targets.add( target )
+
+            # creates go on their own, updates wait to be batched
+            if operation['action'] == 'update':
+                updates.append( operation )
+            else:
+                batches.append( [operation] )
+
+        # batch the updates if the server can take them that way, otherwise one at a time
+        size = self.batch_size if len( updates ) > 1 and self.batch_size > 1 and self._probe_bulk_updates( ) else 1
+        batches.extend( updates[start:start + size] for start in range( 0, len( updates ), size ) )
+
+        # return the batches
+        return batches
+
+    # run a batch of operations, returning a result or the error for each one
+    def _execute_batch( self, batch: List[Dict[str, Any]] ) -> List[Any]:
+
+        # a batch of updates goes in one request
+        if len( batch ) > 1:
+
+            # give it a shot
+            try:
+                return self._update_channels_bulk( batch )
+
+            # whoopsie... one bad channel shouldn't sink the rest, so go one at a time
+            except ( APIException, requests.exceptions.RequestException ) as e:
+                print( f"{e}, retrying them one at a time" )
+
+        # hold the outcomes
+        outcomes = []
+
+        # run them one by one, keeping each failure with its operation
+        for operation in batch:
+            try:
+                outcomes.append( self._execute_operation( operation ) )
+            except ( APIException, requests.exceptions.RequestException ) as e:
+                outcomes.append( e )
+
+        # return the outcomes
+        return outcomes
+
+    # run a batch, unless the time budget won't stretch to it... none means it was deferred
+    def _execute_batch_in_time( self, batch: List[Dict[str, Any]] ) -> Any:
+
+        # we've been asked to stop, so don't start anything new
+        if self.stop_event.is_set( ):
+            return CANCELLED
+
+        # not enough time left for another one
+        if self.deadline is not None and time.monotonic( ) + self.batch_seconds > self.deadline:
+            return None
+
+        # run it, keeping a running idea of how long they take
+        started = time.monotonic( )
+        outcomes = self._execute_batch( batch )
+        self.batch_seconds = 0.8 * self.batch_seconds + 0.2 * ( time.monotonic( ) - started ) if self.batch_seconds else time.monotonic( ) - started
+
+        # return the outcomes
+        return outcomes
+
+    # run a single planned operation
+    def _execute_operation( self, operation: Dict[str, Any] ) -> Optional[Dict[str, Any]]:
+
+        # if it exists, update the channel
+        if operation['action'] == 'update':
+            return self._update_channel( operation['channel_id'], operation['name'], operation['streams'], operation.get( 'keep' ) )
+
+        # otherwise create the channel
+        return self._create_channel( operation['name'], operation['streams'], operation.get( 'keep' ) )
+
+    # run the compiled batches across the worker pool
+    def _execute_plan( self, batches: List[List[Dict[str, Any]]] ) -> List[Dict[str, Any]]:
+
+        # hold the results, the outcomes waiting to be journaled, and reset the failures and what's deferred for this run
+        results = []
+        self.failures = []
+        self.deferred = []
+        cancelled = 0
+        dropped = False
+        journal: List[Tuple[int, str, Optional[int], Optional[str]]] = []
+        flushed = time.perf_counter( )
 
-                    # create the channel
-                    result = self._create_channel(channel_name, streams)
+        # fire off the writes, letting anyone watching know we're mid-write
+        self.writing = True
+        try:
+            with ThreadPoolExecutor( max_workers=self.workers, initializer=inherit_prefix( ) ) as pool:
+
+                # submit them all, keeping them in plan order
+                futures = [pool.submit( self._execute_batch_in_time, batch ) for batch in batches]
+
+                # give it a shot
+                try:
+
+                    # collect the outcomes in plan order so the output is deterministic
+                    for batch, future in zip( batches, futures ):
+
+                        # if we've been asked to stop, drop everything that hasn't started yet... a worker that picked one up already skips it
+                        if self.stop_event.is_set( ) and not dropped:
+                            cancelled += sum( len( pending_batch ) for pending_batch, pending in zip( batches, futures ) if pending.cancel( ) )
+                            dropped = True
+                        if future.cancelled( ) or future.result( ) is CANCELLED:
+                            if not future.cancelled( ):
+                                cancelled += len( batch )
+                            for operation in batch:
+                                operation['status'] = 'cancelled'
+                            journal.extend( self._journal_outcomes( batch ) )
+                            continue
+
+                        # the time budget ran out before it could start
+                        if future.result( ) is None:
+                            for operation in batch:
+                                operation['status'] = 'deferred'
+                            self.deferred.extend( batch )
+                            journal.extend( self._journal_outcomes( batch ) )
+                            continue
+
+                        # loop over what came back for each operation
+                        for operation, result in zip( batch, future.result( ) ):
+
+                            # whoopsie... record it and keep going
+                            if isinstance( result, Exception ):
+                                operation['status'] = 'failed'
+                                self.metrics.count( 'failed' )
+                                self.failures.append( { 'action': operation['action'], 'name': operation['name'], 'error': str( result ) } )
+                                print( f"Failed to {operation['action']} channel: {operation['name']} ({result})" )
+                                continue
+
+                            # if we have a result
+                            operation['status'] = 'done' if result else 'skipped'
+                            if result:
+
+                                # append them, and hang on to the new channel's id
+                                results.append( result )
+                                operation['channel_id'] = result.get( 'id', operation['channel_id'] )
+
+                                # log/print the action we took
+                                self._log_channel_action( operation['name'], operation['streams'], exists=operation['action'] == 'update' )
+
+                        # journal how they went, every so often
+                        journal.extend( self._journal_outcomes( batch, future.result( ) ) )
+                        if len( journal ) >= JOURNAL_FLUSH_SIZE or time.perf_counter( ) - flushed >= JOURNAL_FLUSH_SECONDS:
+                            self._flush_journal( journal )
+                            flushed = time.perf_counter( )
+
+                # we're being forced out, so let the writes already running finish and drop the rest without waiting on them
+                except BaseException:
+                    pool.shutdown( wait=False, cancel_futures=True )
+                    raise
+
+        # all done writing, journal whatever's left
+        finally:
+            self.writing = False
+            self._flush_journal( journal )
+
+        # show how many failed, or never ran
+        if self.failures:
+            print( f"{len( self.failures )} channel writes failed" )
+        if cancelled:
+            self.metrics.count( 'cancelled', cancelled )
+            print( f"Stopped early, {cancelled} channel writes cancelled" )
+        if self.deferred:
+            self._report_deferred( )
+
+        # return the results
+        return results
+
+    # show what the time budget left for the next run
+    def _report_deferred( self ) -> None:
+
+        # count them
+        self.metrics.count( 'deferred', len( self.deferred ) )
+        print( f"Time budget of {self.time_budget:g}s ran out, {len( self.deferred )} channel writes deferred to the next run" )
+
+        # and name them, unless we're quiet
+        if not self.quiet:
+            for operation in self.deferred:
+                print( f"  Deferred {operation['action']} of channel: {operation['name']} ({len( operation['streams'] )} Streams)" )
+
+    # start journaling the writes we're about to run, numbering them in the order they'll go out
+    def _start_journal( self, batches: List[List[Dict[str, Any]]], hashes: Optional[Dict[str, str]] = None ) -> None:
+
+        # nowhere to keep it
+        if not self.state:
+            return
+
+        # hold the entries
+        entries = []
+
+        # loop over the operations
+        for seq, operation in enumerate( operation for batch in batches for operation in batch ):
+            operation['seq'] = seq
+            entries.append( {
+                'seq': seq,
+                'action': operation['action'],
+                'name': operation['name'],
+                'channel_id': operation['channel_id'],
+                'hash': ( hashes or {} ).get( operation['name'] ),
+                'payload': self._channel_payload( operation['name'], operation['streams'], operation.get( 'keep' ) ),
+            } )
+
+        # replace the last journal, letting on if it never finished
+        unfinished = self.state.start_journal( entries )
+        if unfinished:
+            print( f"Dropping {unfinished} unfinished channel writes from the last run's journal, this plan covers them" )
+
+    # the journal outcomes of a batch, for the operations we're journaling
+    def _journal_outcomes( self, batch: List[Dict[str, Any]], results: Optional[List[Any]] = None ) -> List[Tuple[int, str, Optional[int], Optional[str]]]:
+        return [
+            ( operation['seq'], operation['status'], operation['channel_id'], str( result ) if isinstance( result, Exception ) else None )
+            for operation, result in zip( batch, results or [None] * len( batch ) ) if 'seq' in operation
+        ]
+
+    # save the journal outcomes we're holding
+    def _flush_journal( self, journal: List[Tuple[int, str, Optional[int], Optional[str]]] ) -> None:
+        if self.state and journal:
+            self.state.update_journal( journal )
+        journal.clear( )
+
+    # wrap up the journal, dropping it if everything made it
+    def _finish_journal( self ) -> None:
+
+        # nowhere to keep it
+        if not self.state:
+            return
+
+        # all done, or leave it for a resume
+        unfinished = len( self.state.load_journal( ) )
+        if not unfinished:
+            self.state.clear_journal( )
+        else:
+            print( f"{unfinished} channel writes didn't finish, run with --resume to pick them up" )
+
+    # a journaled stream list as a group, just the ids
+    def _journal_streams( self, stream_ids: List[int] ) -> StreamGroup:
+        table = StreamTable( )
+        return StreamGroup( table, [table.add( { 'id': stream_id } ) for stream_id in stream_ids] )
+
+    # turn the unfinished journal back into operations, checking each against what the server has now
+    def _repair_journal( self, entries: List[Dict[str, Any]], channels: List[Dict[str, Any]] ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+
+        # setup the lookups, the first channel with a name wins
+        by_id = { channel.get( 'id' ): channel for channel in channels if isinstance( channel, dict ) }
+        by_name: Dict[str, Dict[str, Any]] = {}
+        for channel in by_id.values( ):
+            by_name.setdefault( channel.get( 'name' ), channel )
+
+        # hold the operations, what turned out to be done already, and the channels the updates are after
+        operations, done = [], []
+        claimed = { entry['channel_id'] for entry in entries if entry['action'] == 'update' }
+        repaired = 0
+
+        # loop over the entries
+        for entry in entries:
+
+            # the channel an update was after, or the one a create got part or all of the way to making
+            payload = entry['payload']
+            if entry['action'] == 'update':
+                channel = by_id.get( entry['channel_id'] )
+            else:
+                channel = by_name.get( payload['name'] )
+                if channel and channel.get( 'id' ) in claimed:
+                    channel = None
+                if channel:
+                    claimed.add( channel.get( 'id' ) )
+                    repaired += 1
+
+            # it made it before we were cut off
+            if channel and self._channel_matches( channel, payload ):
+                done.append( { **entry, 'channel_id': channel.get( 'id' ) } )
+                continue
+
+            # otherwise queue it up again, an update if the channel's there and a create if it isn't
+            operations.append( {
+                'seq': entry['seq'],
+                'action': 'update' if channel else 'create',
+                'channel_id': channel.get( 'id' ) if channel else None,
+                'name': entry['name'],
+                'streams': self._journal_streams( payload['streams'] ),
+                'keep': payload,
+                'hash': entry['hash'],
+            } )
+
+        # show what we found
+        if repaired:
+            print( f"Found {repaired} channels created before the interruption, checking them instead of creating them again" )
 
-                # if we have a result                
-                if result:
+        # return them
+        return operations, done
 
-                    # append them
-                    results.append( result )
+    # run the channel creator/updater
+    def create_channels( self, dry_run: bool = False, full: bool = False ) -> List[Dict[str, Any]]:
+
+        # start a fresh set of numbers for this run, and the clock on the time budget
+        self.metrics = Metrics( self.base_url, self.profile )
+        self.deadline = time.monotonic( ) + self.time_budget if self.time_budget else None
+
+        # a snapshot only holds the whole library, and replaying one never touches the server
+        if ( self.snapshot_in or self.snapshot_out ) and self.scoped:
+            raise ValueError( "Snapshots hold the whole library, they can't be combined with a scoped sync" )
+        replay = SnapshotReader( self.snapshot_in ) if self.snapshot_in else None
+        capture = None
+
+        # give it a shot
+        try:
+
+            # grab the streams from the snapshot
+            if replay:
+                print( f"Replaying snapshot of {replay.instance} captured {datetime.fromtimestamp( replay.header['captured_at'] ):%Y-%m-%d %H:%M}, nothing will be written..." )
+                streams = replay.streams( )
+
+            # or from the server, making sure we're logged in before anything else
+            else:
+                with self.metrics.phase( 'auth' ):
+                    self.tokens.access_token( )
+                print( "Fetching streams..." )
+                streams = self._get_streams( )
+
+                # saving them as they go past, if we're set to
+                if self.snapshot_out:
+                    capture = SnapshotWriter( self.snapshot_out, self.base_url, self.stream_fields )
+                    streams = capture.record_streams( streams )
+
+            # group the streams as the pages arrive... waiting on pages counts as fetching, the rest is grouping
+            started = time.perf_counter( )
+            channel_groups = self._group_and_sort_streams( self._timed( streams, 'fetch' ) )
+            self.metrics.add_time( 'group', time.perf_counter( ) - started - self.metrics.phases['fetch'] )
+            print( f"Found {sum( len( group ) for group in channel_groups.values( ) )} streams" )
+
+            # order the failover by how quickly each stream actually starts, if we're set to... probing is live, so not on a replay
+            if self.prober and not replay:
+                with self.metrics.phase( 'probe' ):
+                    channel_groups = self._rank_by_probes( channel_groups )
+
+            # map the logos to the server's, if we're set to... that's live too, so not on a replay
+            if self.logos and not replay:
+                with self.metrics.phase( 'logos' ):
+                    self._resolve_logos( channel_groups )
+
+            # everything from here to the writes is reconciling, bar fetching the channels
+            started = time.perf_counter( )
+            fetched = self.metrics.phases['fetch']
+
+            # a scoped sync only sees part of each group, so it can't use or update the state cache, and a replay plans everything
+            state = None if self.scoped or replay else self.state
+
+            # hash the groups, and see which ones haven't changed since the last run
+            hashes = { name: self._group_hash( name, streams ) for name, streams in channel_groups.items( ) }
+            cached = state.load_groups( ) if state else {}
+            removed = [name for name in cached if name not in channel_groups]
+            clean = {} if full else {
+                name: cached[name][1] for name in channel_groups
+                if name in cached and cached[name][0] == hashes[name]
+            }
+            dirty = { name: streams for name, streams in channel_groups.items( ) if name not in clean }
+
+            # show what the cache saved us
+            if state and not full:
+                print( f"State cache: {len( clean )} groups unchanged since the last run, {len( dirty )} changed or new, {len( removed )} gone" )
+
+            # grab all existing channels, from the snapshot if we're replaying one... even when nothing changed, since a cached channel may have been deleted
+            print( "Reading channels..." if replay else "Fetching channels..." )
+            with self.metrics.phase( 'fetch' ):
+                channels = replay.channels( ) if replay else self._get_channels( )
+            index = self._index_channels( channels )
+
+            # replay what the server could do, and save the channels and that with the snapshot
+            if replay:
+                self.bulk_updates = bool( replay.meta.get( 'bulk_updates' ) )
+            if capture:
+                capture.record_channels( channels )
+                capture.close( { 'bulk_updates': self._probe_bulk_updates( ) } )
+                print( f"Saved snapshot of {capture.streams} streams and {capture.channels} channels to {self.snapshot_out}" )
+                capture = None
+            print( f"Found {len(index)} channels" )
+
+            # a cached channel that's been deleted on the server needs rebuilding
+            for name, channel_id in list( clean.items( ) ):
+                if not index.has_id( channel_id ):
+                    dirty[name] = channel_groups[name]
+                    del clean[name]
+
+            # work out only what actually needs writing, leaving the cached channels to their groups
+            operations, unchanged = self._plan_channels( dirty, index, set( clean.values( ) ) )
+
+            # compile the plan into as few requests as we can
+            batches = self._compile_plan( operations ) if operations else []
+
+            # show the plan
+            creates = sum( 1 for operation in operations if operation['action'] == 'create' )
+            print( f"Plan: {creates} to create, {len( operations ) - creates} to update, {len( unchanged ) + len( clean )} unchanged (writes skipped), {len( batches )} write requests" )
+            self.metrics.count( 'skipped', len( unchanged ) + len( clean ) )
+            self.metrics.add_time( 'reconcile', time.perf_counter( ) - started - ( self.metrics.phases['fetch'] - fetched ) )
+
+            # just show the plan if this is a dry run, or a replay
+            if dry_run or replay:
+                self._print_plan( batches )
+                return []
+
+            # don't start writing if we've been asked to stop
+            if self.stop_event.is_set( ):
+                print( "Stop requested, skipping channel writes" )
+                return []
+
+            # run the writes, journaling them so an interrupted run can be resumed
+            self._start_journal( batches, hashes if state else None )
+            with self.metrics.phase( 'write' ):
+                results = self._execute_plan( batches )
+            self._finish_journal( )
+
+            # remember everything that's now in sync, and forget what's gone
+            if state:
+                synced = { **unchanged, **{ operation['name']: operation['channel_id'] for operation in operations if operation.get( 'status' ) == 'done' } }
+                state.save_groups( { name: ( hashes[name], channel_id ) for name, channel_id in synced.items( ) } )
+                state.delete_groups( removed )
 
-                    # log/print the action we took
-                    self._log_channel_action( channel_name, streams, exists=bool( channel_id ) )
-                    
             # return the results
             return results
 
@@ -394,3 +1580,80 @@ class DCHG_Main:
         except Exception as e:
             print( f"Error in create_channels: {str(e)}" )
             raise
+
+        # stop the clock, however it went, and don't leave a partial snapshot or an open one behind
+        finally:
+            self.metrics.finish( )
+            if capture:
+                capture.abort( )
+            if replay:
+                replay.close( )
+
+    # pick up the writes an interrupted run didn't finish, straight from the journal
+    def resume_channels( self, dry_run: bool = False ) -> List[Dict[str, Any]]:
+
+        # start a fresh set of numbers for this run, and the clock on the time budget
+        self.metrics = Metrics( self.base_url, self.profile )
+        self.deadline = time.monotonic( ) + self.time_budget if self.time_budget else None
+
+        # nothing to pick up
+        entries = self.state.load_journal( ) if self.state else []
+        if not entries:
+            print( "Nothing to resume, the last run finished all of its channel writes" )
+            return []
+
+        # give it a shot
+        try:
+
+            # make sure we're logged in before anything else
+            with self.metrics.phase( 'auth' ):
+                self.tokens.access_token( )
+
+            # the streams are already in the journal, but the channels may have moved on since
+            print( f"Resuming {len( entries )} unfinished channel writes from the journal..." )
+            print( "Fetching channels..." )
+            with self.metrics.phase( 'fetch' ):
+                channels = self._get_channels( )
+            print( f"Found {len( channels )} channels" )
+
+            # work out what's still to do, and compile it
+            with self.metrics.phase( 'reconcile' ):
+                operations, done = self._repair_journal( entries, channels )
+                batches = self._compile_plan( operations ) if operations else []
+
+            # show the plan
+            creates = sum( 1 for operation in operations if operation['action'] == 'create' )
+            print( f"Plan: {creates} to create, {len( operations ) - creates} to update, {len( done )} already done (writes skipped), {len( batches )} write requests" )
+            self.metrics.count( 'skipped', len( done ) )
+
+            # just show the plan if this is a dry run
+            if dry_run:
+                self._print_plan( batches )
+                return []
+
+            # don't start writing if we've been asked to stop
+            if self.stop_event.is_set( ):
+                print( "Stop requested, skipping channel writes" )
+                return []
+
+            # what was already done goes in the journal, then run the rest
+            self.state.update_journal( [( entry['seq'], 'done', entry['channel_id'], None ) for entry in done] )
+            with self.metrics.phase( 'write' ):
+                results = self._execute_plan( batches )
+            self._finish_journal( )
+
+            # remember the groups that are now in sync, if the run that planned them was keeping track
+            synced = done + [operation for operation in operations if operation.get( 'status' ) == 'done']
+            self.state.save_groups( { entry['name']: ( entry['hash'], entry['channel_id'] ) for entry in synced if entry['hash'] } )
+
+            # return the results
+            return results
+
+        # whoopsie...
+        except Exception as e:
+            print( f"Error in resume_channels: {str(e)}" )
+            raise
+
+        # stop the clock, however it went
+        finally:
+            self.metrics.finish( )
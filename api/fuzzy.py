@@ -0,0 +1,89 @@
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+import math
+import re
+
+# pulls the digit runs out of a name
+DIGITS = re.compile( r'\d+' )
+
+# clusters near-duplicate names without comparing every pair
+class FuzzyGrouper:
+
+    # fire it up!
+    def __init__( self, threshold: float = 0.8, ngram: int = 3 ):
+
+        # make sure the threshold makes sense
+        if not 0 < threshold <= 1:
+            raise ValueError( f"Invalid fuzzy threshold {threshold}, it must be greater than 0 and at most 1" )
+
+        # setup the internals
+        self.threshold = threshold
+        self.ngram = max( 1, ngram )
+
+    # the character n-grams of a name, ignoring case, spacing and punctuation
+    def _grams( self, name: str ) -> Set[str]:
+
+        # squash it down to just letters and digits
+        squashed = ''.join( char for char in name.casefold( ) if char.isalnum( ) )
+
+        # short names are their own gram
+        if len( squashed ) <= self.ngram:
+            return { squashed } if squashed else set( )
+
+        # return the grams
+        return { squashed[i:i + self.ngram] for i in range( len( squashed ) - self.ngram + 1 ) }
+
+    # cluster the names, returning each name's cluster root
+    def cluster( self, names: Iterable[str] ) -> Dict[str, str]:
+
+        # hold the grams, and how common each one is across all names
+        grams = { name: self._grams( name ) for name in names }
+        frequency = Counter( gram for name_grams in grams.values( ) for gram in name_grams )
+
+        # union-find over the names
+        parent = { name: name for name in grams }
+        def find( name: str ) -> str:
+            while parent[name] != name:
+                parent[name] = parent[parent[name]]
+                name = parent[name]
+            return name
+
+        # the blocking index, keyed on the digits in a name plus one of its rarest grams,
+        # "Fox Sports 1" and "Fox Sports 2" never land in the same block
+        index: Dict[Tuple[Tuple[str, ...], str], List[str]] = defaultdict( list )
+
+        # smallest first, so everything we probe against is no bigger than we are
+        for name in sorted( grams, key=lambda name: ( len( grams[name] ), name ) ):
+
+            # skip anything without grams
+            name_grams = grams[name]
+            if not name_grams:
+                continue
+
+            # any name at least threshold-similar must share one of our rarest grams
+            size = len( name_grams )
+            digits = tuple( DIGITS.findall( name ) )
+            prefix = sorted( name_grams, key=lambda gram: ( frequency[gram], gram ) )[:size - math.ceil( self.threshold * size ) + 1]
+
+            # probe the blocks we fall into
+            compared: Set[str] = set( )
+            for gram in prefix:
+                for other in index[( digits, gram )]:
+
+                    # skip what we've already looked at, and what's too small to ever match
+                    if other in compared:
+                        continue
+                    compared.add( other )
+                    if len( grams[other] ) < self.threshold * size:
+                        continue
+
+                    # jaccard similarity of the grams
+                    shared = len( name_grams & grams[other] )
+                    if shared / ( size + len( grams[other] ) - shared ) >= self.threshold:
+                        parent[find( name )] = find( other )
+
+                # and add ourselves to the block
+                index[( digits, gram )].append( name )
+
+        # return each name's root
+        return { name: find( name ) for name in grams }
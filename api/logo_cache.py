@@ -0,0 +1,175 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePosixPath
+from typing import Any, Callable, Dict, Iterable, Optional
+from urllib.parse import unquote, urlsplit
+import hashlib
+import threading
+import time
+import requests
+from utils.exceptions import APIException
+
+# the most of a logo we'll read to hash it, anything bigger isn't a logo
+MAX_LOGO_BYTES = 5 * 1024 * 1024
+
+# maps each distinct logo to the server's logo id once, by url and by what's actually at the url
+class LogoCache:
+
+    # fire it up!
+    def __init__( self, list_logos: Callable[[], Dict[str, int]], create_logo: Callable[[str, str], Optional[int]],
+                  store: Optional[Any] = None, ttl: float = 86400, workers: int = 8, timeout: float = 10.0 ):
+
+        # setup the internals
+        self._list_logos = list_logos
+        self._create_logo = create_logo
+        self.store = store
+        self.ttl = ttl
+        self.workers = max( 1, workers )
+        self.timeout = timeout
+        self.checked = 0
+        self.changed = 0
+        self.registered = 0
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+
+        # the logos live on all sorts of hosts, so they get their own session, without our api token
+        self.session = requests.Session( )
+
+    # the server's logo id for a url, if we have one
+    def id_for( self, url: Optional[str] ) -> Optional[int]:
+        entry = self._entries.get( url ) if url else None
+        return entry['logo_id'] if entry else None
+
+    # a name for a logo, from the file name in its url
+    @staticmethod
+    def _name( url: str ) -> str:
+        return unquote( PurePosixPath( urlsplit( url ).path ).stem ) or urlsplit( url ).hostname or url
+
+    # fetch a logo to hash it, only if it changed since we last did... none if we couldn't get it
+    def _fetch( self, url: str, entry: Optional[Dict[str, Any]] ) -> Optional[Dict[str, Any]]:
+
+        # ask for it only if it's changed, if we know how it looked
+        headers = {}
+        if entry and entry.get( 'etag' ):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get( 'modified' ):
+            headers['If-Modified-Since'] = entry['modified']
+
+        # give it a shot
+        try:
+            with self.session.get( url, headers=headers, timeout=self.timeout, stream=True ) as response:
+
+                # it hasn't changed, so it's good for another while
+                if response.status_code == 304 and entry:
+                    return { **entry, 'checked_at': time.time( ) }
+
+                # it's gone, or never was
+                response.raise_for_status( )
+
+                # hash it as it comes in, giving up on anything too big to be a logo
+                digest = hashlib.sha256( )
+                size = 0
+                for chunk in response.iter_content( 65536 ):
+                    size += len( chunk )
+                    if size > MAX_LOGO_BYTES:
+                        return None
+                    digest.update( chunk )
+
+                # return what it looks like now, a changed source needs its id worked out again
+                content_hash = digest.hexdigest( )
+                return {
+                    'hash': content_hash,
+                    'etag': response.headers.get( 'ETag' ),
+                    'modified': response.headers.get( 'Last-Modified' ),
+                    'logo_id': entry['logo_id'] if entry and entry.get( 'hash' ) == content_hash else None,
+                    'checked_at': time.time( ),
+                }
+
+        # whoopsie... we'll try again next time
+        except ( requests.exceptions.RequestException, ValueError ):
+            return None
+
+    # work out the server's logo id for each url, fetching only what's stale and registering only what's new
+    def resolve( self, urls: Iterable[str], stop_event: Optional[threading.Event] = None ) -> Dict[str, Optional[int]]:
+
+        # pull in the saved logos the first time
+        if self.store is not None and not self._loaded:
+            self._entries.update( self.store.load_logos( ) )
+            self._loaded = True
+
+        # see what's gone stale
+        urls = { url for url in urls if url }
+        stale = time.time( ) - self.ttl
+        pending = [url for url in urls if url not in self._entries or self._entries[url]['checked_at'] < stale]
+
+        # fetch those, a logo we can't reach keeps what we knew about it
+        changed: Dict[str, Dict[str, Any]] = {}
+        with ThreadPoolExecutor( max_workers=self.workers ) as pool:
+            fetches = { url: pool.submit( self._fetch_unless_stopped, url, stop_event ) for url in pending }
+            for url, future in fetches.items( ):
+                entry = future.result( )
+                if entry is not None:
+                    changed[url] = entry
+
+        # keep count of what we looked at, and what turned out to be new or different
+        self.checked = len( changed )
+        self.changed = sum( 1 for url, entry in changed.items( ) if entry['hash'] != self._entries.get( url, {} ).get( 'hash' ) )
+        self._entries.update( changed )
+
+        # a logo deleted on the server would have every write carrying its id rejected, so check the ids we're holding are still there
+        server: Optional[Dict[str, int]] = None
+        if any( self._entries[url]['logo_id'] for url in urls if url in self._entries ):
+            server = self._list_logos( )
+            known = set( server.values( ) )
+            for url, entry in self._entries.items( ):
+                if entry.get( 'logo_id' ) and entry['logo_id'] not in known:
+                    entry['logo_id'] = None
+                    changed[url] = entry
+
+        # the ids we already have for each logo's content, so the same image at another url isn't registered again
+        by_hash = { entry['hash']: entry['logo_id'] for entry in self._entries.values( ) if entry.get( 'hash' ) and entry.get( 'logo_id' ) }
+        self.registered = 0
+
+        # loop over the logos that still need an id
+        for url in sorted( url for url in urls if url in self._entries and not self._entries[url]['logo_id'] ):
+
+            # the same image under another url
+            entry = self._entries[url]
+            logo_id = by_hash.get( entry.get( 'hash' ) )
+
+            # the server already has this url, we only ask for its logos the once
+            if logo_id is None:
+                if server is None:
+                    server = self._list_logos( )
+                logo_id = server.get( url )
+
+            # otherwise it's new, so register it
+            if logo_id is None:
+                try:
+                    logo_id = self._create_logo( self._name( url ), url )
+                    self.registered += 1
+                except ( APIException, requests.exceptions.RequestException ) as e:
+                    print( f"Failed to register logo {url}: {e}" )
+                    continue
+
+            # remember it
+            entry['logo_id'] = logo_id
+            changed[url] = entry
+            if entry.get( 'hash' ):
+                by_hash.setdefault( entry['hash'], logo_id )
+
+        # save what changed
+        if self.store is not None and changed:
+            self.store.save_logos( changed )
+
+        # return the ids
+        return { url: self.id_for( url ) for url in urls }
+
+    # fetch a logo, unless we've been asked to stop
+    def _fetch_unless_stopped( self, url: str, stop_event: Optional[threading.Event] ) -> Optional[Dict[str, Any]]:
+        if stop_event is not None and stop_event.is_set( ):
+            return None
+        return self._fetch( url, self._entries.get( url ) )
+
+    # let go of the connections
+    def close( self ) -> None:
+        self.session.close( )
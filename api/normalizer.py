@@ -0,0 +1,109 @@
+from functools import lru_cache
+from typing import List, Pattern, Sequence, Tuple, Union
+import re
+import unicodedata
+
+# the folds we know how to apply
+FOLDS = ( 'case', 'whitespace', 'unicode' )
+
+# separates a pattern from its substitution in a rule
+RULE_SEPARATOR = ' => '
+
+# split rules out of a config value or cli arguments, one rule per line
+def parse_rules( rules: Union[str, Sequence[str], None] ) -> List[Tuple[str, str]]:
+
+    # nothing to do
+    if not rules:
+        return []
+
+    # config values come in as a single multi-line string
+    lines = rules.splitlines( ) if isinstance( rules, str ) else [line for rule in rules for line in rule.splitlines( )]
+
+    # hold the parsed rules
+    parsed = []
+
+    # loop over the non-empty lines
+    for line in lines:
+        if not line.strip( ):
+            continue
+
+        # "pattern => replacement" substitutes, a bare pattern deletes
+        pattern, _, replacement = line.partition( RULE_SEPARATOR )
+        parsed.append( ( pattern, replacement ) )
+
+    # return the rules
+    return parsed
+
+# parse and validate the folds, either comma separated or already split
+def parse_folds( folds: Union[str, Sequence[str], None] ) -> List[str]:
+
+    # nothing to do
+    if not folds:
+        return []
+
+    # split it up if we need to
+    keys = folds.split( ',' ) if isinstance( folds, str ) else [fold for value in folds for fold in value.split( ',' )]
+    keys = list( dict.fromkeys( key.strip( ).lower( ) for key in keys if key.strip( ) ) )
+
+    # make sure we know them all
+    if any( key not in FOLDS for key in keys ):
+        raise ValueError( f"Invalid normalizer fold '{folds}', valid folds are {', '.join( FOLDS )}" )
+
+    # return the folds
+    return keys
+
+# compiles the normalizer rules once, and memoizes the results
+class Normalizer:
+
+    # fire it up!
+    def __init__( self, rules: Union[str, Sequence[str], None] = None, folds: Union[str, Sequence[str], None] = None, cache_size: int = 65536 ):
+
+        # setup the internals
+        self.folds = parse_folds( folds )
+        self.rules: List[Tuple[Pattern, str]] = []
+
+        # compile every rule up front, so a bad one fails now instead of silently doing nothing
+        for pattern, replacement in parse_rules( rules ):
+            try:
+                self.rules.append( ( re.compile( pattern ), replacement ) )
+            except re.error as e:
+                raise ValueError( f"Invalid normalizer pattern '{pattern}': {e}" ) from e
+
+        # the same raw names repeat across accounts, so remember what we've already worked out
+        self.normalize = lru_cache( maxsize=cache_size )( self._normalize )
+        self.key = lru_cache( maxsize=cache_size )( self._key )
+
+    # normalize a name for display
+    def _normalize( self, name: str ) -> str:
+
+        # fold compatibility characters first, so the rules see plain text
+        if 'unicode' in self.folds:
+            name = unicodedata.normalize( 'NFKC', name )
+
+        # run the rules in order
+        for pattern, replacement in self.rules:
+            name = pattern.sub( replacement, name )
+
+        # collapse the whitespace
+        if 'whitespace' in self.folds:
+            name = ' '.join( name.split( ) )
+
+        # return the name
+        return name
+
+    # the key names are grouped on
+    def _key( self, name: str ) -> str:
+
+        # start with the display name
+        key = self.normalize( name )
+
+        # strip the accents
+        if 'unicode' in self.folds:
+            key = ''.join( char for char in unicodedata.normalize( 'NFKD', key ) if not unicodedata.combining( char ) )
+
+        # fold the case
+        if 'case' in self.folds:
+            key = key.casefold( )
+
+        # return the key
+        return key
@@ -0,0 +1,257 @@
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from itertools import chain, zip_longest
+from urllib.parse import urljoin, urlsplit
+from typing import Any, DefaultDict, Dict, Iterable, List, Optional, Tuple
+import re
+import socket
+import ssl
+import threading
+import time
+
+# redirects a probe will follow, providers love bouncing through a load balancer or two
+MAX_REDIRECTS = 3
+
+# statuses that send us somewhere else
+REDIRECT_STATUSES = { 301, 302, 303, 307, 308 }
+
+# how we introduce ourselves to the providers
+USER_AGENT = 'VLC/3.0.20 LibVLC/3.0.20'
+
+# statuses a provider sends when it's turning us away rather than the stream being dead: auth, rate limits and bandwidth caps
+REFUSED_STATUSES = { 401, 403, 429, 509 }
+
+# how an error reply reads when the account is at its connection limit, whatever status it comes with
+CONNECTION_LIMIT = re.compile( r'(max|too many|limit)\W*(\w+\W+){0,2}connections?|connections?\W*(\w+\W+){0,2}(limit|reached|exceeded)', re.IGNORECASE )
+
+# probes at once against a provider we don't know the connection limit of, most only allow an account one or two
+DEFAULT_CONNECTIONS = 2
+
+# host lookups at once, they're quick but a slow resolver shouldn't hold up the probes themselves
+DNS_WORKERS = 8
+
+# certificates are checked by default, since the urls usually carry the account's credentials... some providers' certificates are
+# broken though, so that can be turned off
+_TLS = ssl.create_default_context( )
+_INSECURE_TLS = ssl.create_default_context( )
+_INSECURE_TLS.check_hostname = False
+_INSECURE_TLS.verify_mode = ssl.CERT_NONE
+
+# checks how quickly stream urls start answering, so the quickest can go first
+class StreamProber:
+
+    # fire it up!
+    def __init__( self, timeout: float = 3.0, workers: int = 32, ttl: float = 21600, tier: float = 0.25, store: Optional[Any] = None,
+                  connections: int = DEFAULT_CONNECTIONS, verify_tls: bool = True ):
+
+        # setup the internals
+        self.timeout = timeout
+        self.workers = max( 1, workers )
+        self.ttl = ttl
+        self.tier = tier
+        self.store = store
+        self.connections = max( 1, connections )
+        self.tls = _TLS if verify_tls else _INSECURE_TLS
+        self.cached = 0
+        self.probed = 0
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock( )
+        self._lookups: Dict[Tuple[str, int], Future] = {}
+        self._dns: Optional[ThreadPoolExecutor] = None
+
+    # a probe result, ok is none when the provider turned us away and we can't tell either way
+    @staticmethod
+    def _result( ok: Optional[bool], connect: Optional[float] = None, first_byte: Optional[float] = None, error: Optional[str] = None ) -> Dict[str, Any]:
+        return { 'ok': ok, 'connect': connect, 'first_byte': first_byte, 'error': error, 'probed_at': time.time( ) }
+
+    # probe a single url: how long to connect, and how long until the first byte of the stream
+    def probe( self, url: str ) -> Dict[str, Any]:
+
+        # the clock runs across redirects, the whole probe gets one timeout
+        started = time.perf_counter( )
+        connected = None
+
+        # loop while we're being redirected
+        for _ in range( MAX_REDIRECTS + 1 ):
+
+            # make sure it's something we can talk to
+            parts = urlsplit( url )
+            if parts.scheme not in ( 'http', 'https' ) or not parts.hostname:
+                return self._result( False, error=f"unsupported url {url[:64]}" )
+
+            # whatever's left of the timeout
+            remaining = self.timeout - ( time.perf_counter( ) - started )
+            if remaining <= 0:
+                return self._result( False, connected, error='timed out' )
+
+            # setup the connection
+            port = parts.port or ( 443 if parts.scheme == 'https' else 80 )
+            if parts.scheme == 'https':
+                connection = HTTPSConnection( parts.hostname, port, timeout=remaining, context=self.tls )
+            else:
+                connection = HTTPConnection( parts.hostname, port, timeout=remaining )
+
+            # give it a shot
+            try:
+
+                # connect, timing the first one... the host lookup runs against the same clock
+                connection.sock = self._connect( parts.hostname, port, parts.scheme == 'https', started )
+                if connected is None:
+                    connected = time.perf_counter( ) - started
+
+                # ask for the stream
+                path = ( parts.path or '/' ) + ( f"?{parts.query}" if parts.query else '' )
+                connection.sock.settimeout( max( 0.001, self.timeout - ( time.perf_counter( ) - started ) ) )
+                connection.request( 'GET', path, headers={ 'User-Agent': USER_AGENT, 'Connection': 'close' } )
+                response = connection.getresponse( )
+
+                # follow a redirect
+                location = response.getheader( 'Location' )
+                if response.status in REDIRECT_STATUSES and location:
+                    url = urljoin( url, location )
+                    continue
+
+                # the provider turned us away, which says nothing about the stream
+                if response.status in REFUSED_STATUSES or ( response.status >= 400 and CONNECTION_LIMIT.search( f"{response.reason} {response.read( 1024 ).decode( 'utf-8', 'replace' )}" ) ):
+                    return self._result( None, connected, error=f"HTTP {response.status}" )
+
+                # anything else that isn't a success is a dead stream
+                if response.status >= 400:
+                    return self._result( False, connected, error=f"HTTP {response.status}" )
+
+                # wait for the first byte of the stream itself
+                response.read( 1 )
+                return self._result( True, connected, time.perf_counter( ) - started )
+
+            # whoopsie... it's dead, or too slow
+            except ( OSError, HTTPException ) as e:
+                return self._result( False, connected, error=str( e ) or type( e ).__name__ )
+
+            # don't hang on to it, we only wanted the timing
+            finally:
+                connection.close( )
+
+        # we went round in circles
+        return self._result( False, connected, error='too many redirects' )
+
+    # look a host up, the once per host, off the probe's own thread so a slow resolver can't hold it past its timeout
+    def _lookup( self, host: str, port: int ) -> Future:
+        with self._lock:
+            if ( host, port ) not in self._lookups:
+                if self._dns is None:
+                    self._dns = ThreadPoolExecutor( max_workers=DNS_WORKERS, thread_name_prefix='probe-dns' )
+                self._lookups[( host, port )] = self._dns.submit( socket.getaddrinfo, host, port, type=socket.SOCK_STREAM )
+            return self._lookups[( host, port )]
+
+    # open a socket to a host inside what's left of the probe's timeout, lookup included
+    def _connect( self, host: str, port: int, tls: bool, started: float ) -> socket.socket:
+
+        # look it up, giving up if that takes too long
+        try:
+            addresses = self._lookup( host, port ).result( timeout=max( 0.001, self.timeout - ( time.perf_counter( ) - started ) ) )
+        except FutureTimeout:
+            raise socket.timeout( f"timed out looking up {host}" )
+
+        # try each address in turn
+        error: OSError = OSError( f"no addresses for {host}" )
+        for family, kind, proto, _, address in addresses:
+            remaining = self.timeout - ( time.perf_counter( ) - started )
+            if remaining <= 0:
+                raise socket.timeout( 'timed out' )
+            sock = socket.socket( family, kind, proto )
+            try:
+                sock.settimeout( remaining )
+                sock.connect( address )
+                return self.tls.wrap_socket( sock, server_hostname=host ) if tls else sock
+            except OSError as e:
+                sock.close( )
+                error = e
+
+        # none of them answered
+        raise error
+
+    # probe a bunch of urls at once, using the cached results that are still fresh, and never more at once than each provider allows
+    def probe_all( self, urls: Iterable[str], stop_event: Optional[threading.Event] = None, accounts: Optional[Dict[str, Any]] = None,
+                   limits: Optional[Dict[Any, int]] = None ) -> Dict[str, Dict[str, Any]]:
+
+        # pull in the saved probes the first time
+        since = time.time( ) - self.ttl
+        if self.store is not None and not self._cache:
+            self._cache.update( self.store.load_probes( since ) )
+
+        # split out what's still fresh
+        urls = set( urls )
+        results = { url: self._cache[url] for url in urls if url in self._cache and self._cache[url]['probed_at'] >= since }
+        pending = [url for url in urls if url not in results]
+        self.cached = len( results )
+
+        # split them up by the account they belong to, or their host
+        providers: DefaultDict[Tuple[str, Any], List[str]] = defaultdict( list )
+        for url in pending:
+            account = ( accounts or {} ).get( url )
+            providers[( 'account', account ) if account is not None else ( 'host', urlsplit( url ).hostname )].append( url )
+
+        # the connections each one gets, what its account allows if we know, otherwise the default
+        slots = { provider: threading.BoundedSemaphore( self._connections( provider, limits ) ) for provider in providers }
+
+        # take them in turns, so the workers spread across the providers instead of queueing up on one
+        order = [url for url in chain.from_iterable( zip_longest( *providers.values( ) ) ) if url is not None]
+        provider_of = { url: provider for provider, provider_urls in providers.items( ) for url in provider_urls }
+
+        # probe the rest, stopping early if we're asked to
+        probed: Dict[str, Dict[str, Any]] = {}
+        try:
+            with ThreadPoolExecutor( max_workers=self.workers ) as pool:
+                futures = { url: pool.submit( self._probe_unless_stopped, url, slots[provider_of[url]], stop_event ) for url in order }
+                for url, future in futures.items( ):
+                    result = future.result( )
+                    if result is not None:
+                        probed[url] = result
+            self.probed = len( probed )
+
+        # look the hosts up again next time, without waiting on any lookup that's still stuck
+        finally:
+            with self._lock:
+                if self._dns is not None:
+                    self._dns.shutdown( wait=False, cancel_futures=True )
+                self._dns = None
+                self._lookups = {}
+
+        # remember them, bar the ones we were turned away from, they're worth another go next time
+        known = { url: result for url, result in probed.items( ) if result['ok'] is not None }
+        with self._lock:
+            self._cache.update( known )
+        if self.store is not None:
+            self.store.save_probes( known, since )
+
+        # return them all
+        results.update( probed )
+        return results
+
+    # how many probes a provider can take at once, what its account allows if we know it, the default if it's unlimited or unknown
+    def _connections( self, provider: Tuple[str, Any], limits: Optional[Dict[Any, int]] ) -> int:
+        kind, key = provider
+        limit = ( limits or {} ).get( key ) if kind == 'account' else None
+        return limit if limit and limit > 0 else self.connections
+
+    # probe a url once its provider has a connection free, unless we've been asked to stop
+    def _probe_unless_stopped( self, url: str, slot: threading.BoundedSemaphore, stop_event: Optional[threading.Event] ) -> Optional[Dict[str, Any]]:
+        with slot:
+            if stop_event is not None and stop_event.is_set( ):
+                return None
+            return self.probe( url )
+
+    # the sort key for a stream: responding ones first, quickest tier first, then unknown, then dead
+    def rank( self, result: Optional[Dict[str, Any]] ) -> Tuple[int, int]:
+
+        # never probed, or the provider turned us away
+        if result is None or result['ok'] is None:
+            return ( 1, 0 )
+
+        # dead
+        if not result['ok']:
+            return ( 2, 0 )
+
+        # responding, bucketed so a little jitter between runs doesn't reshuffle everything
+        return ( 0, int( result['first_byte'] / self.tier ) if self.tier > 0 else 0 )
@@ -0,0 +1,201 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import json
+import sqlite3
+import threading
+import time
+
+# remembers what each group looked like the last time we synced it
+class StateStore:
+
+    # fire it up!
+    def __init__( self, path: Union[str, Path], instance: str ):
+
+        # setup the internals, one file can hold the state for several instances
+        self.path = Path( path )
+        self.instance = instance
+        self._lock = threading.Lock( )
+
+        # open it up, making sure the tables are there
+        self.path.parent.mkdir( parents=True, exist_ok=True )
+        self._db = sqlite3.connect( str( self.path ), timeout=30, check_same_thread=False )
+        with self._lock, self._db:
+            self._db.execute( """
+                CREATE TABLE IF NOT EXISTS groups (
+                    instance TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    channel_id INTEGER,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY ( instance, name )
+                )
+            """ )
+            self._db.execute( """
+                CREATE TABLE IF NOT EXISTS probes (
+                    url TEXT PRIMARY KEY,
+                    ok INTEGER NOT NULL,
+                    connect REAL,
+                    first_byte REAL,
+                    error TEXT,
+                    probed_at REAL NOT NULL
+                )
+            """ )
+            self._db.execute( """
+                CREATE TABLE IF NOT EXISTS journal (
+                    instance TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    action TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    channel_id INTEGER,
+                    hash TEXT,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY ( instance, seq )
+                )
+            """ )
+            self._db.execute( """
+                CREATE TABLE IF NOT EXISTS logos (
+                    instance TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    hash TEXT,
+                    etag TEXT,
+                    modified TEXT,
+                    logo_id INTEGER,
+                    checked_at REAL NOT NULL,
+                    PRIMARY KEY ( instance, url )
+                )
+            """ )
+
+    # load the saved groups, name -> ( hash, channel id )
+    def load_groups( self ) -> Dict[str, Tuple[str, Optional[int]]]:
+
+        # grab them all for this instance
+        with self._lock:
+            rows = self._db.execute( "SELECT name, hash, channel_id FROM groups WHERE instance = ?", ( self.instance, ) ).fetchall( )
+
+        # return them
+        return { name: ( group_hash, channel_id ) for name, group_hash, channel_id in rows }
+
+    # save groups we know are in sync, name -> ( hash, channel id )
+    def save_groups( self, groups: Dict[str, Tuple[str, Optional[int]]] ) -> None:
+
+        # nothing to do
+        if not groups:
+            return
+
+        # upsert them all in one transaction
+        now = time.time( )
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO groups ( instance, name, hash, channel_id, updated_at ) VALUES ( ?, ?, ?, ?, ? )",
+                [( self.instance, name, group_hash, channel_id, now ) for name, ( group_hash, channel_id ) in groups.items( )]
+            )
+
+    # forget groups that no longer exist
+    def delete_groups( self, names: Iterable[str] ) -> None:
+
+        # delete them all in one transaction
+        with self._lock, self._db:
+            self._db.executemany( "DELETE FROM groups WHERE instance = ? AND name = ?", [( self.instance, name ) for name in names] )
+
+    # load the stream probes taken since a point in time, url -> probe
+    def load_probes( self, since: float ) -> Dict[str, Dict[str, Any]]:
+
+        # grab them all, they're shared across instances since the same url is the same stream
+        with self._lock:
+            rows = self._db.execute( "SELECT url, ok, connect, first_byte, error, probed_at FROM probes WHERE probed_at >= ?", ( since, ) ).fetchall( )
+
+        # return them
+        return {
+            url: { 'ok': bool( ok ), 'connect': connect, 'first_byte': first_byte, 'error': error, 'probed_at': probed_at }
+            for url, ok, connect, first_byte, error, probed_at in rows
+        }
+
+    # save stream probes, url -> probe, dropping any that have gone stale
+    def save_probes( self, probes: Dict[str, Dict[str, Any]], stale: float ) -> None:
+
+        # upsert them all in one transaction
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO probes ( url, ok, connect, first_byte, error, probed_at ) VALUES ( ?, ?, ?, ?, ?, ? )",
+                [( url, int( probe['ok'] ), probe['connect'], probe['first_byte'], probe['error'], probe['probed_at'] ) for url, probe in probes.items( )]
+            )
+            self._db.execute( "DELETE FROM probes WHERE probed_at < ?", ( stale, ) )
+
+    # load the logos we know, url -> what it looked like and its logo id on the server
+    def load_logos( self ) -> Dict[str, Dict[str, Any]]:
+
+        # grab them all for this instance, the ids are the server's own
+        with self._lock:
+            rows = self._db.execute( "SELECT url, hash, etag, modified, logo_id, checked_at FROM logos WHERE instance = ?", ( self.instance, ) ).fetchall( )
+
+        # return them
+        return {
+            url: { 'hash': content_hash, 'etag': etag, 'modified': modified, 'logo_id': logo_id, 'checked_at': checked_at }
+            for url, content_hash, etag, modified, logo_id, checked_at in rows
+        }
+
+    # save logos, url -> what it looked like and its logo id on the server
+    def save_logos( self, logos: Dict[str, Dict[str, Any]] ) -> None:
+
+        # upsert them all in one transaction
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO logos ( instance, url, hash, etag, modified, logo_id, checked_at ) VALUES ( ?, ?, ?, ?, ?, ?, ? )",
+                [( self.instance, url, logo['hash'], logo['etag'], logo['modified'], logo['logo_id'], logo['checked_at'] ) for url, logo in logos.items( )]
+            )
+
+    # start a new journal of planned channel writes, replacing the last one... returns how many of those never finished
+    def start_journal( self, entries: Iterable[Dict[str, Any]] ) -> int:
+
+        # swap them over in one transaction
+        now = time.time( )
+        with self._lock, self._db:
+            unfinished = self._db.execute( "SELECT COUNT(*) FROM journal WHERE instance = ? AND status NOT IN ( 'done', 'skipped' )", ( self.instance, ) ).fetchone( )[0]
+            self._db.execute( "DELETE FROM journal WHERE instance = ?", ( self.instance, ) )
+            self._db.executemany(
+                "INSERT INTO journal ( instance, seq, action, name, channel_id, hash, payload, status, updated_at ) VALUES ( ?, ?, ?, ?, ?, ?, ?, 'pending', ? )",
+                [( self.instance, entry['seq'], entry['action'], entry['name'], entry['channel_id'], entry['hash'], json.dumps( entry['payload'] ), now ) for entry in entries]
+            )
+
+        # return what we dropped
+        return unfinished
+
+    # record how journaled writes went, as ( seq, status, channel id, error )
+    def update_journal( self, outcomes: Iterable[Tuple[int, str, Optional[int], Optional[str]]] ) -> None:
+
+        # update them all in one transaction
+        now = time.time( )
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE journal SET status = ?, channel_id = COALESCE( ?, channel_id ), error = ?, updated_at = ? WHERE instance = ? AND seq = ?",
+                [( status, channel_id, error, now, self.instance, seq ) for seq, status, channel_id, error in outcomes]
+            )
+
+    # load the journaled writes that haven't finished, in plan order
+    def load_journal( self ) -> List[Dict[str, Any]]:
+
+        # grab them
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seq, action, name, channel_id, hash, payload, status, error FROM journal WHERE instance = ? AND status NOT IN ( 'done', 'skipped' ) ORDER BY seq",
+                ( self.instance, )
+            ).fetchall( )
+
+        # return them
+        return [
+            { 'seq': seq, 'action': action, 'name': name, 'channel_id': channel_id, 'hash': group_hash, 'payload': json.loads( payload ), 'status': status, 'error': error }
+            for seq, action, name, channel_id, group_hash, payload, status, error in rows
+        ]
+
+    # forget the journal, everything in it is done
+    def clear_journal( self ) -> None:
+        with self._lock, self._db:
+            self._db.execute( "DELETE FROM journal WHERE instance = ?", ( self.instance, ) )
+
+    # close the database
+    def close( self ) -> None:
+        with self._lock:
+            self._db.close( )
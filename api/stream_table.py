@@ -0,0 +1,107 @@
+from array import array
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Sequence
+
+# the logo a stream gets when the source doesn't have one
+DEFAULT_LOGO = 'https://cdn.kevp.us/tv/kptv-icon.png'
+
+# the columns we keep for each stream
+COLUMNS = ( 'id', 'logo_url', 'tvg_id', 'channel_group', 'm3u_account', 'url' )
+
+# the streams we group, one column per field, with the repeated values shared
+class StreamTable:
+
+    # keep the instances lean
+    __slots__ = ( 'columns', '_values', '_ranks' )
+
+    # fire it up!
+    def __init__( self ):
+
+        # setup the columns, the ids pack down to machine integers
+        self.columns: Dict[str, Any] = { column: [] for column in COLUMNS }
+        self.columns['id'] = array( 'q' )
+        self._values: Dict[Hashable, Hashable] = {}
+        self._ranks: Optional[array] = None
+
+    # how many streams we hold
+    def __len__( self ) -> int:
+        return len( self.columns['id'] )
+
+    # share one copy of each repeated value
+    def _intern( self, value: Any ) -> Any:
+        if value is None:
+            return None
+        return self._values.setdefault( value, value )
+
+    # add a stream, returning its row
+    def add( self, stream: Dict[str, Any] ) -> int:
+
+        # hold the row we're adding
+        row = len( self )
+
+        # setup the columns
+        self.columns['id'].append( stream['id'] )
+        self.columns['logo_url'].append( self._intern( stream.get( 'logo_url', DEFAULT_LOGO ) ) )
+        self.columns['tvg_id'].append( self._intern( stream.get( 'tvg_id' ) ) )
+        self.columns['channel_group'].append( self._intern( stream.get( 'channel_group' ) ) )
+        self.columns['m3u_account'].append( self._intern( stream.get( 'm3u_account' ) ) )
+        self.columns['url'].append( stream.get( 'url' ) )
+        self._ranks = None
+
+        # return the row
+        return row
+
+    # the account order of every row, worked out once over the distinct accounts
+    def ranks( self ) -> array:
+
+        # only when something's been added since
+        if self._ranks is None:
+            accounts = self.columns['m3u_account']
+            order = { account: rank for rank, account in enumerate( sorted( set( accounts ), key=lambda account: ( account is None, account or 0 ) ) ) }
+            self._ranks = array( 'l', ( order[account] for account in accounts ) )
+
+        # return the ranks
+        return self._ranks
+
+    # order rows by account, keeping the order they arrived in within an account
+    def sort( self, rows: List[int] ) -> List[int]:
+        rows.sort( key=self.ranks( ).__getitem__ )
+        return rows
+
+    # a single stream as a dict
+    def row( self, row: int ) -> Dict[str, Any]:
+        return { column: values[row] for column, values in self.columns.items( ) }
+
+# one group's streams, as rows of the table
+class StreamGroup:
+
+    # keep the instances lean
+    __slots__ = ( 'table', 'rows' )
+
+    # fire it up!
+    def __init__( self, table: StreamTable, rows: Sequence[int] ):
+        self.table = table
+        self.rows = rows
+
+    # how many streams are in the group
+    def __len__( self ) -> int:
+        return len( self.rows )
+
+    # each stream as a dict, for anything that wants to look at them one by one
+    def __iter__( self ) -> Iterator[Dict[str, Any]]:
+        return ( self.table.row( row ) for row in self.rows )
+
+    # the stream ids, in order
+    @property
+    def ids( self ) -> List[int]:
+        ids = self.table.columns['id']
+        return [ids[row] for row in self.rows]
+
+    # the values of a column, in order
+    def values( self, column: str ) -> List[Any]:
+        values = self.table.columns[column]
+        return [values[row] for row in self.rows]
+
+    # the first value of a column that's actually set
+    def first_valid( self, column: str ) -> Any:
+        values = self.table.columns[column]
+        return next( ( value for row in self.rows if ( value := values[row] ) not in ( None, '' ) ), None )
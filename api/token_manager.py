@@ -0,0 +1,78 @@
+from typing import Any, Callable, Dict, Optional
+import base64
+import json
+import threading
+import time
+
+# read the expiry out of a jwt, without verifying it, we only need to know when to renew
+def token_expiry( token: Optional[str] ) -> Optional[float]:
+
+    # give it a shot
+    try:
+
+        # the payload is the middle, base64url encoded without padding
+        payload = token.split( '.' )[1]
+        payload += '=' * ( -len( payload ) % 4 )
+
+        # return the expiry
+        expiry = json.loads( base64.urlsafe_b64decode( payload ) ).get( 'exp' )
+        return float( expiry ) if expiry is not None else None
+
+    # not a jwt we can read, we'll find out it expired from a 401
+    except ( AttributeError, IndexError, TypeError, ValueError ):
+        return None
+
+# keeps a valid access token around, renewing it before it expires
+class TokenManager:
+
+    # fire it up!
+    def __init__( self, authenticate: Callable[[], Dict[str, Any]], refresh: Callable[[str], Dict[str, Any]], leeway: float = 60 ):
+
+        # setup the internals
+        self._authenticate = authenticate
+        self._refresh = refresh
+        self.leeway = leeway
+        self._lock = threading.Lock( )
+        self._access: Optional[str] = None
+        self._refresh_token: Optional[str] = None
+        self.expires_at: Optional[float] = None
+
+    # hand back a token that's good for a while yet, renewing it if it isn't
+    def access_token( self ) -> str:
+
+        # only one caller renews, everyone else waits and gets the new token
+        with self._lock:
+            if self._access is None or ( self.expires_at is not None and time.time( ) >= self.expires_at - self.leeway ):
+                self._renew( )
+            return self._access
+
+    # the server rejected a token, so make sure the next caller renews it
+    def invalidate( self, token: Optional[str] ) -> None:
+
+        # only if nobody has renewed it already
+        with self._lock:
+            if token == self._access:
+                self._access = None
+
+    # renew the access token, using the refresh token while it's still good
+    def _renew( self ) -> None:
+
+        # hold the tokens
+        tokens = None
+
+        # try the refresh token first, it's cheaper than logging in again
+        refresh_expires = token_expiry( self._refresh_token )
+        if self._refresh_token and ( refresh_expires is None or time.time( ) < refresh_expires - self.leeway ):
+            try:
+                tokens = self._refresh( self._refresh_token )
+            except Exception as e:
+                print( f"Token refresh failed, re-authenticating... ({e})" )
+
+        # otherwise log in from scratch
+        if not tokens or not tokens.get( 'access' ):
+            tokens = self._authenticate( )
+
+        # hang on to them, the refresh token may or may not be rotated
+        self._access = tokens['access']
+        self._refresh_token = tokens.get( 'refresh', self._refresh_token )
+        self.expires_at = token_expiry( self._access )
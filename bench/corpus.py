@@ -0,0 +1,91 @@
+from typing import Any, Dict, List
+import random
+import re
+
+# real-world style channel names to build the corpus around
+NETWORKS = [
+    "ESPN", "ESPN 2", "ESPNews", "Fox Sports 1", "Fox Sports 2", "Fox News", "CNN", "CNN International", "HLN",
+    "MSNBC", "CNBC", "BBC One", "BBC Two", "BBC News", "ITV 1", "Channel 4", "Sky Sports Main Event",
+    "Sky Sports Premier League", "Sky Cinema Action", "Discovery Channel", "Animal Planet", "National Geographic",
+    "History", "A&E", "AMC", "TNT", "TBS", "USA Network", "Comedy Central", "Cartoon Network", "Nickelodeon",
+    "Disney Channel", "Disney Junior", "HBO", "HBO 2", "Cinemax", "Showtime", "Starz", "NFL Network",
+    "NBA TV", "MLB Network", "NHL Network", "Golf Channel", "Tennis Channel", "beIN Sports", "DAZN 1",
+]
+
+# words to make up the long tail of smaller channels
+WORDS = [
+    "Action", "Kids", "Movies", "News", "Sports", "Music", "Classic", "Prime", "Max", "Plus", "World", "Live",
+    "Star", "Cinema", "Family", "Comedy", "Drama", "Nature", "Science", "Travel", "Food", "Retro", "Gold", "Zone",
+]
+
+# how providers decorate the same channel
+PREFIXES = ["", "", "", "US: ", "[US] ", "USA | ", "US - "]
+SUFFIXES = ["", "", " HD", " FHD", " 4K", " SD", " HD", " (East)"]
+
+# a normalizer that undoes the decorations above
+NORMALIZER = [r"^(US: |\[US\] |USA \| |US - )", r"\s(HD|FHD|4K|SD|\(East\))$"]
+
+# make a slug for tvg ids and logos
+def _slug( name: str ) -> str:
+    return re.sub( r'[^a-z0-9]+', '', name.lower( ) )
+
+# the distinct channel names, the well known ones first then the long tail
+def base_names( count: int, rng: random.Random ) -> List[str]:
+
+    # start with the networks
+    names = list( dict.fromkeys( NETWORKS ) )[:count]
+    seen = set( names )
+
+    # then make up the rest
+    while len( names ) < count:
+        name = f"{' '.join( rng.sample( WORDS, rng.randint( 1, 2 ) ) )} {rng.randint( 1, 999 )}"
+        if name not in seen:
+            seen.add( name )
+            names.append( name )
+
+    # return them
+    return names
+
+# build a synthetic stream listing, with every channel repeated across several providers
+def build_corpus( size: int, accounts: int = 8, streams_per_channel: float = 5.0, seed: int = 1 ) -> List[Dict[str, Any]]:
+
+    # setup the generator and the names
+    rng = random.Random( seed )
+    bases = base_names( max( 1, int( size / streams_per_channel ) ), rng )
+
+    # hold the streams
+    streams = []
+
+    # loop over the streams we want
+    for stream_id in range( 1, size + 1 ):
+
+        # popular channels show up a lot more, like on real providers
+        base = bases[min( len( bases ) - 1, int( rng.paretovariate( 1.2 ) ) - 1 ) if rng.random( ) < 0.3 else rng.randrange( len( bases ) )]
+        account = rng.randint( 1, accounts )
+
+        # decorate it like a provider would
+        name = f"{rng.choice( PREFIXES )}{base}{rng.choice( SUFFIXES )}"
+        if rng.random( ) < 0.1:
+            name = name.upper( )
+
+        # every field the api sends, not just the ones we use
+        streams.append( {
+            'id': stream_id,
+            'name': name,
+            'url': f"http://provider{account}.example/live/{stream_id}.ts",
+            'm3u_account': account,
+            'logo_url': f"https://logos.example/{_slug( base )}.png" if rng.random( ) < 0.8 else None,
+            'tvg_id': f"{_slug( base )}.us" if rng.random( ) < 0.7 else None,
+            'local_file': None,
+            'current_viewers': 0,
+            'updated_at': '2026-01-01T00:00:00Z',
+            'last_seen': '2026-01-01T00:00:00Z',
+            'stream_profile_id': None,
+            'is_custom': False,
+            'channel_group': rng.randint( 1, 20 ),
+            'stream_hash': f"{rng.getrandbits( 128 ):032x}",
+            'custom_properties': None,
+        } )
+
+    # return the streams
+    return streams
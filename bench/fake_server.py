@@ -0,0 +1,389 @@
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+import base64
+import hashlib
+import json
+import re
+import threading
+import time
+
+# matches the channel detail endpoint
+CHANNEL_DETAIL = re.compile( r'^/api/channels/channels/(\d+)/$' )
+
+# matches the stand-in stream urls
+STREAM_URL = re.compile( r'^/stream/(\d+)$' )
+
+# matches the stand-in logo urls
+LOGO_URL = re.compile( r'^/logo/([^/]+)$' )
+
+# the number on the end of a long tail channel's logo name
+LOGO_NUMBER = re.compile( r'\d*\.png$' )
+
+# the bulk channel update endpoint
+BULK_UPDATE = '/api/channels/channels/edit/bulk/'
+
+# build an unsigned jwt, the client only ever reads the expiry
+def fake_jwt( lifetime: float ) -> str:
+    payload = base64.urlsafe_b64encode( json.dumps( { 'exp': time.time( ) + lifetime } ).encode( ) ).decode( ).rstrip( '=' )
+    return f"e30.{payload}.fake"
+
+# an in-process stand-in for the parts of the Dispatcharr api we use
+class FakeDispatcharr:
+
+    # fire it up!
+    def __init__( self, streams: List[Dict[str, Any]], latency: float = 0.0, max_page_size: int = 2500,
+                  token_lifetime: float = 3600, paginate_channels: bool = False, accounts: int = 8,
+                  direct_create: bool = True, bulk_update: bool = True,
+                  stream_latency: Optional[Callable[[int], Optional[float]]] = None, serve_logos: bool = False ):
+
+        # setup the internals
+        self.streams = streams
+        self.latency = latency
+        self.max_page_size = max_page_size
+        self.token_lifetime = token_lifetime
+        self.paginate_channels = paginate_channels
+        self.direct_create = direct_create
+        self.bulk_update = bulk_update
+        self.stream_latency = stream_latency
+        self.serve_logos = serve_logos
+        self.logo_versions: Counter = Counter( )
+        self.logos: Dict[int, Dict[str, Any]] = {}
+        self.accounts = [
+            { 'id': account_id, 'name': f"Provider {account_id}", 'is_active': True, 'status': 'success', 'updated_at': '' }
+            for account_id in range( 1, accounts + 1 )
+        ]
+        self.groups = [{ 'id': group_id, 'name': f"Group {group_id}" } for group_id in sorted( { stream.get( 'channel_group' ) for stream in streams } - { None } )]
+        self.channels: Dict[int, Dict[str, Any]] = {}
+        self.requests: Counter = Counter( )
+        self._next_id = 1
+        self._lock = threading.Lock( )
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # the base url to point the client at
+    @property
+    def url( self ) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    # start serving on a free port in a background thread
+    def start( self ) -> 'FakeDispatcharr':
+
+        # hand the handler a reference back to us
+        server = self
+        class Handler( _Handler ):
+            fake = server
+
+        # start it up
+        self._server = ThreadingHTTPServer( ( '127.0.0.1', 0 ), Handler )
+        self._server.daemon_threads = True
+        threading.Thread( target=self._server.serve_forever, daemon=True ).start( )
+
+        # serve the streams ourselves too, if we're standing in for the providers
+        if self.stream_latency:
+            for stream in self.streams:
+                stream['url'] = f"{self.url}/stream/{stream['id']}"
+
+        # and the logos
+        if self.serve_logos:
+            for stream in self.streams:
+                if stream.get( 'logo_url' ):
+                    stream['logo_url'] = f"{self.url}/logo/{stream['logo_url'].rsplit( '/', 1 )[-1]}"
+        return self
+
+    # stop serving
+    def stop( self ) -> None:
+        if self._server:
+            self._server.shutdown( )
+            self._server.server_close( )
+
+    # forget the request counts
+    def reset_counts( self ) -> None:
+        with self._lock:
+            self.requests.clear( )
+
+    # count a request against its endpoint
+    def count( self, endpoint: str ) -> None:
+        with self._lock:
+            self.requests[endpoint] += 1
+
+    # update a channel record, returning the updated copy or none if we don't have it
+    def update_channel( self, channel_id: Any, data: Dict[str, Any] ) -> Optional[Dict[str, Any]]:
+
+        # make sure it's a channel we know
+        with self._lock:
+            channel = self.channels.get( channel_id )
+            if channel is None:
+                return None
+
+            # update it
+            channel.update( { key: data[key] for key in ( 'name', 'streams', 'tvg_id', 'channel_group_id', 'logo_id' ) if key in data } )
+            return dict( channel )
+
+    # create a channel record
+    def create_channel( self, data: Dict[str, Any] ) -> Dict[str, Any]:
+
+        # hand out the next id
+        with self._lock:
+            channel = { 'id': self._next_id, 'name': data.get( 'name' ), 'streams': list( data.get( 'streams' ) or [] ),
+                        'tvg_id': data.get( 'tvg_id' ), 'channel_group_id': data.get( 'channel_group_id' ), 'logo_id': data.get( 'logo_id' ) }
+            self.channels[self._next_id] = channel
+            self._next_id += 1
+
+        # return the channel
+        return dict( channel )
+
+    # register a logo, none if we already have the url
+    def create_logo( self, data: Dict[str, Any] ) -> Optional[Dict[str, Any]]:
+
+        # the url is unique
+        with self._lock:
+            if any( logo['url'] == data.get( 'url' ) for logo in self.logos.values( ) ):
+                return None
+
+            # hand out the next id
+            logo = { 'id': len( self.logos ) + 1, 'name': data.get( 'name' ), 'url': data.get( 'url' ) }
+            self.logos[logo['id']] = logo
+
+        # return the logo
+        return dict( logo )
+
+    # the bytes of a stand-in logo, which change whenever its version is bumped... numbered channels share one
+    # image, like the placeholders providers use, so different urls can hold the same logo
+    def logo_content( self, name: str ) -> bytes:
+        return f"{LOGO_NUMBER.sub( '', name )}:{self.logo_versions[name]}".encode( ) * 64
+
+    # filter the streams the way the api's stream filter does
+    def filter_streams( self, query: Dict[str, List[str]] ) -> List[Dict[str, Any]]:
+
+        # nothing to filter on
+        streams = self.streams
+        if 'm3u_account' not in query and 'channel_group_name' not in query:
+            return streams
+
+        # the account is an exact id, the group name a case insensitive contains
+        if 'm3u_account' in query:
+            account = int( query['m3u_account'][0] )
+            streams = [stream for stream in streams if stream.get( 'm3u_account' ) == account]
+        if 'channel_group_name' in query:
+            needle = query['channel_group_name'][0].casefold( )
+            names = { group['id'] for group in self.groups if needle in group['name'].casefold( ) }
+            streams = [stream for stream in streams if stream.get( 'channel_group' ) in names]
+
+        # return them
+        return streams
+
+    # paginate a listing the way the api does
+    def page( self, records: List[Dict[str, Any]], path: str, query: Dict[str, List[str]] ) -> Dict[str, Any]:
+
+        # work out the page
+        page = max( 1, int( query.get( 'page', ['1'] )[0] ) )
+        page_size = min( self.max_page_size, max( 1, int( query.get( 'page_size', ['100'] )[0] ) ) )
+        results = records[( page - 1 ) * page_size:page * page_size]
+
+        # return it with the links, which carry any filters along
+        more = page * page_size < len( records )
+        link = lambda number: f"{self.url}{path}?{urlencode( { **{ key: values[0] for key, values in query.items( ) }, 'page': number, 'page_size': page_size } )}"
+        return {
+            'count': len( records ),
+            'next': link( page + 1 ) if more else None,
+            'previous': link( page - 1 ) if page > 1 else None,
+            'results': results,
+        }
+
+# handles the requests for the stand-in
+class _Handler( BaseHTTPRequestHandler ):
+
+    # set on the subclass built in start( )
+    fake: FakeDispatcharr = None
+
+    # keep-alive, like the real thing behind a proxy, without nagle stalling the split header/body writes
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    # keep quiet
+    def log_message( self, format: str, *args: Any ) -> None:
+        pass
+
+    # send a json response
+    def _send( self, status: int, body: Any = None ) -> None:
+        payload = json.dumps( body ).encode( ) if body is not None else b''
+        self.send_response( status )
+        self.send_header( 'Content-Type', 'application/json' )
+        self.send_header( 'Content-Length', str( len( payload ) ) )
+        self.end_headers( )
+        self.wfile.write( payload )
+
+    # read the json body
+    def _body( self ) -> Dict[str, Any]:
+        length = int( self.headers.get( 'Content-Length', 0 ) )
+        return json.loads( self.rfile.read( length ) ) if length else {}
+
+    # simulate the round trip and count it
+    def _begin( self, endpoint: str ) -> None:
+        self.fake.count( endpoint )
+        if self.fake.latency:
+            time.sleep( self.fake.latency )
+
+    # listings
+    def do_GET( self ) -> None:
+
+        # split up the url
+        parsed = urlparse( self.path )
+        query = parse_qs( parsed.query )
+
+        # the streams, always paginated
+        if parsed.path == '/api/channels/streams/':
+            self._begin( 'streams' )
+            return self._send( 200, self.fake.page( self.fake.filter_streams( query ), parsed.path, query ) )
+
+        # the channels, paginated or as a plain list
+        if parsed.path == '/api/channels/channels/':
+            self._begin( 'channels' )
+            channels = [dict( channel ) for channel in list( self.fake.channels.values( ) )]
+            return self._send( 200, self.fake.page( channels, parsed.path, query ) if self.fake.paginate_channels else channels )
+
+        # a stream, slow or dead as the latency function says
+        match = STREAM_URL.match( parsed.path )
+        if match and self.fake.stream_latency:
+            self.fake.count( 'stream-probe' )
+            delay = self.fake.stream_latency( int( match.group( 1 ) ) )
+            if delay is None:
+                return self._send( 503, { 'detail': 'Stream unavailable.' } )
+            time.sleep( delay )
+
+            # the prober may well have given up on us by now
+            try:
+                self.send_response( 200 )
+                self.send_header( 'Content-Type', 'video/mp2t' )
+                self.send_header( 'Content-Length', '188' )
+                self.end_headers( )
+                self.wfile.write( b'\x47' + bytes( 187 ) )
+            except ( BrokenPipeError, ConnectionResetError ):
+                self.close_connection = True
+            return
+
+        # a logo, which only comes back if it changed since the version asked about
+        match = LOGO_URL.match( parsed.path )
+        if match and self.fake.serve_logos:
+            self.fake.count( 'logo-fetch' )
+            content = self.fake.logo_content( match.group( 1 ) )
+            etag = f'"{hashlib.sha1( content ).hexdigest( )}"'
+            if self.headers.get( 'If-None-Match' ) == etag:
+                self.send_response( 304 )
+                self.send_header( 'ETag', etag )
+                self.send_header( 'Content-Length', '0' )
+                self.end_headers( )
+                return
+            self.send_response( 200 )
+            self.send_header( 'Content-Type', 'image/png' )
+            self.send_header( 'ETag', etag )
+            self.send_header( 'Content-Length', str( len( content ) ) )
+            self.end_headers( )
+            self.wfile.write( content )
+            return
+
+        # the logos
+        if parsed.path == '/api/channels/logos/':
+            self._begin( 'logos' )
+            return self._send( 200, self.fake.page( [dict( logo ) for logo in list( self.fake.logos.values( ) )], parsed.path, query ) )
+
+        # the m3u accounts
+        if parsed.path == '/api/m3u/accounts/':
+            self._begin( 'accounts' )
+            return self._send( 200, self.fake.accounts )
+
+        # the channel groups
+        if parsed.path == '/api/channels/groups/':
+            self._begin( 'groups' )
+            return self._send( 200, self.fake.groups )
+
+        # whatever else
+        self._send( 404, { 'detail': 'Not found.' } )
+
+    # tokens, refreshes and creates
+    def do_POST( self ) -> None:
+
+        # grab the body
+        parsed = urlparse( self.path )
+        body = self._body( )
+
+        # log in, or refresh
+        if parsed.path in ( '/api/accounts/token/', '/api/accounts/token/refresh/' ):
+            self._begin( 'token' if parsed.path.endswith( '/token/' ) else 'token-refresh' )
+            return self._send( 200, { 'access': fake_jwt( self.fake.token_lifetime ), 'refresh': fake_jwt( self.fake.token_lifetime * 24 ) } )
+
+        # an m3u refresh
+        if parsed.path.startswith( '/api/m3u/refresh/' ):
+            self._begin( 'm3u-refresh' )
+            for account in self.fake.accounts:
+                account['updated_at'] = str( time.time( ) )
+            return self._send( 202, { 'success': True } )
+
+        # a channel with everything in one go, if we're standing in for a server that takes it
+        if parsed.path == '/api/channels/channels/':
+            self._begin( 'channel-create' )
+            if not self.fake.direct_create:
+                return self._send( 405, { 'detail': 'Method "POST" not allowed.' } )
+            return self._send( 201, self.fake.create_channel( body ) )
+
+        # a logo, if we don't have its url yet
+        if parsed.path == '/api/channels/logos/':
+            self._begin( 'logo-create' )
+            logo = self.fake.create_logo( body )
+            return self._send( 201, logo ) if logo else self._send( 400, { 'url': ['Logo with this url already exists.'] } )
+
+        # a channel from a stream
+        if parsed.path == '/api/channels/channels/from-stream/':
+            self._begin( 'from-stream' )
+            return self._send( 201, self.fake.create_channel( { 'name': body.get( 'name' ), 'streams': [body.get( 'stream_id' )] } ) )
+
+        # whatever else
+        self._send( 404, { 'detail': 'Not found.' } )
+
+    # channel updates
+    def do_PUT( self ) -> None:
+
+        # make sure it's a channel we know
+        self._begin( 'channel-update' )
+        match = CHANNEL_DETAIL.match( urlparse( self.path ).path )
+        body = self._body( )
+        channel = self.fake.update_channel( int( match.group( 1 ) ), body ) if match else None
+        if channel is None:
+            return self._send( 404, { 'detail': 'Not found.' } )
+
+        # send back the update
+        self._send( 200, channel )
+
+    # what the bulk endpoint allows, if we have it
+    def do_OPTIONS( self ) -> None:
+
+        # only the bulk update is probed
+        self._begin( 'options' )
+        if urlparse( self.path ).path != BULK_UPDATE or not self.fake.bulk_update:
+            return self._send( 404, { 'detail': 'Not found.' } )
+
+        # tell them what's allowed
+        payload = b'{}'
+        self.send_response( 200 )
+        self.send_header( 'Allow', 'PATCH, OPTIONS' )
+        self.send_header( 'Content-Type', 'application/json' )
+        self.send_header( 'Content-Length', str( len( payload ) ) )
+        self.end_headers( )
+        self.wfile.write( payload )
+
+    # bulk channel updates
+    def do_PATCH( self ) -> None:
+
+        # make sure we have it
+        self._begin( 'channel-bulk-update' )
+        body = self._body( )
+        if urlparse( self.path ).path != BULK_UPDATE or not self.fake.bulk_update:
+            return self._send( 404, { 'detail': 'Not found.' } )
+
+        # it's all or nothing
+        if not isinstance( body, list ) or any( not isinstance( item, dict ) or item.get( 'id' ) not in self.fake.channels for item in body ):
+            return self._send( 400, { 'detail': 'Every update needs the id of an existing channel.' } )
+
+        # update them all
+        self._send( 200, [self.fake.update_channel( item['id'], item ) for item in body] )
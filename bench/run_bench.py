@@ -0,0 +1,208 @@
+from api.dchg_main import DCHG_Main
+from bench.corpus import NORMALIZER, build_corpus
+from bench.fake_server import FakeDispatcharr
+from utils.snapshot import SnapshotReader
+from contextlib import redirect_stdout
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import io
+import json
+import random
+import time
+import tracemalloc
+
+# run something and time it
+def timed( func: Callable, *args: Any ) -> Tuple[Any, float]:
+    start = time.perf_counter( )
+    result = func( *args )
+    return result, time.perf_counter( ) - start
+
+# build a client pointed at the stand-in
+def make_client( url: str, args: argparse.Namespace ) -> DCHG_Main:
+    return DCHG_Main(
+        url, 'bench', 'bench', args.normalizer or NORMALIZER,
+        page_size=args.page_size,
+        prefetch=args.prefetch,
+        workers=args.workers,
+        folds='case,whitespace',
+        fuzzy_threshold=args.fuzzy_threshold if args.fuzzy else None,
+        quiet=True,
+        probe_timeout=args.probe_timeout if args.probe else None,
+        logo_ttl=86400 if args.logos else None
+    )
+
+# how slow each stand-in stream is to start, seeded so runs compare: most are quick, some crawl, a few are dead
+def stream_latency( seed: int ) -> Callable[[int], Optional[float]]:
+
+    # the latency for a stream id
+    def latency( stream_id: int ) -> Optional[float]:
+        roll = random.Random( seed * 1000003 + stream_id ).random( )
+        return None if roll < 0.05 else 0.5 if roll < 0.15 else roll * 0.05
+
+    # return it
+    return latency
+
+# the streams to run against, a saved snapshot's if we were given one, otherwise a synthetic corpus of the size
+def load_corpus( size: int, args: argparse.Namespace ) -> List[Dict[str, Any]]:
+    if args.snapshot:
+        return list( SnapshotReader( args.snapshot ).streams( ) )
+    return build_corpus( size, seed=args.seed )
+
+# a cold sync against an empty server, then a warm re-sync, using the client's own phase timings
+def bench_sync( size: int, args: argparse.Namespace ) -> Dict[str, Any]:
+
+    # setup the server and the client
+    corpus = load_corpus( size, args )
+    server = FakeDispatcharr( corpus, latency=args.latency, max_page_size=args.max_page_size,
+                              direct_create=not args.legacy_api, bulk_update=not args.legacy_api,
+                              stream_latency=stream_latency( args.seed ) if args.probe else None, serve_logos=args.logos ).start( )
+    api = make_client( server.url, args )
+
+    # track the python heap if we're asked to, it slows everything down
+    if args.memory:
+        tracemalloc.start( )
+
+    # run the cold sync, quietly
+    with redirect_stdout( io.StringIO( ) ):
+        _, cold = timed( api.create_channels )
+    cold_metrics = api.metrics.summary( )
+
+    # grab the peak
+    peak = None
+    if args.memory:
+        peak = tracemalloc.get_traced_memory( )[1]
+        tracemalloc.stop( )
+
+    # hang on to what the cold sync cost
+    cold_requests = dict( server.requests )
+    server.reset_counts( )
+
+    # then a warm re-sync, where nothing should need writing
+    with redirect_stdout( io.StringIO( ) ):
+        _, warm = timed( api.create_channels )
+    warm_requests = dict( server.requests )
+    warm_metrics = api.metrics.summary( )
+
+    # clean up
+    api.close( )
+    server.stop( )
+
+    # return the results
+    return {
+        'streams': len( corpus ),
+        'channels': sum( cold_metrics['channels'][outcome] for outcome in ( 'created', 'updated', 'skipped', 'failed' ) ),
+        'cold_seconds': cold,
+        'cold_phases': cold_metrics['phases'],
+        'cold_requests': cold_requests,
+        'cold_latency': { endpoint: ( stats['p50_seconds'], stats['p95_seconds'] ) for endpoint, stats in cold_metrics['requests'].items( ) },
+        'warm_seconds': warm,
+        'warm_phases': warm_metrics['phases'],
+        'warm_requests': warm_requests,
+        'peak_python_bytes': peak,
+        'failures': len( api.failures ),
+    }
+
+# microbenchmarks of the grouping and the normalizer, no network involved
+def bench_micro( size: int, args: argparse.Namespace ) -> Dict[str, Any]:
+
+    # setup the corpus and a client that never connects
+    corpus = load_corpus( size, args )
+    size = len( corpus )
+    names = [stream['name'] for stream in corpus]
+    api = make_client( 'http://127.0.0.1:9', args )
+
+    # the normalizer, with an empty cache then a warm one
+    api.normalizer.normalize.cache_clear( )
+    _, cold = timed( lambda: [api._normalize_channel_name( name ) for name in names] )
+    warm = min( timed( lambda: [api._normalize_channel_name( name ) for name in names] )[1] for _ in range( args.repeat ) )
+
+    # the grouping, best of a few runs
+    with redirect_stdout( io.StringIO( ) ):
+        group = min( timed( api._group_and_sort_streams, corpus )[1] for _ in range( args.repeat ) )
+
+    # clean up
+    api.close( )
+
+    # return the results
+    return {
+        'streams': size,
+        'distinct_names': len( set( names ) ),
+        'normalize_cold_us': cold / size * 1e6,
+        'normalize_warm_us': warm / size * 1e6,
+        'group_seconds': group,
+    }
+
+# format the request counts
+def _requests( counts: Dict[str, int] ) -> str:
+    return f"{sum( counts.values( ) )} ({', '.join( f'{endpoint} {count}' for endpoint, count in sorted( counts.items( ) ) )})"
+
+# show the results
+def report( syncs: List[Dict[str, Any]], micros: List[Dict[str, Any]] ) -> None:
+
+    # the syncs
+    for result in syncs:
+        print( f"\n== sync: {result['streams']} streams -> {result['channels']} channels" )
+        print( f"cold sync      {result['cold_seconds']:.3f}s  " + '  '.join( f"{phase} {seconds:.3f}s" for phase, seconds in result['cold_phases'].items( ) ) )
+        print( f"cold requests  {_requests( result['cold_requests'] )}" )
+        print( "cold latency   " + '  '.join( f"{endpoint} p50<={p50 * 1000:g}ms p95<={p95 * 1000:g}ms" for endpoint, ( p50, p95 ) in sorted( result['cold_latency'].items( ) ) ) )
+        print( f"warm re-sync   {result['warm_seconds']:.3f}s  " + '  '.join( f"{phase} {seconds:.3f}s" for phase, seconds in result['warm_phases'].items( ) if seconds ) )
+        print( f"warm requests  {_requests( result['warm_requests'] )}" )
+        if result['peak_python_bytes'] is not None:
+            print( f"peak memory    {result['peak_python_bytes'] / 1048576:.1f} MiB (python heap, includes the stand-in's response buffers)" )
+        if result['failures']:
+            print( f"failures       {result['failures']}" )
+
+    # the microbenchmarks
+    for result in micros:
+        print( f"\n== micro: {result['streams']} streams, {result['distinct_names']} distinct names" )
+        print( f"_normalize_channel_name  cold {result['normalize_cold_us']:.2f}us/name  warm {result['normalize_warm_us']:.2f}us/name" )
+        print( f"_group_and_sort_streams  {result['group_seconds']:.3f}s" )
+
+# parse the arguments
+def parse_args( ) -> argparse.Namespace:
+
+    # hold the parser
+    parser = argparse.ArgumentParser( description='Benchmark the channel sync against a local stand-in Dispatcharr' )
+    parser.add_argument( '--sizes', type=int, nargs='+', default=[1000, 10000, 50000], help='Stream corpus sizes to run, 1k to 200k' )
+    parser.add_argument( '--latency', type=float, default=0.002, help='Seconds the stand-in waits before answering each request' )
+    parser.add_argument( '--max-page-size', type=int, default=2500, help='Largest page the stand-in will serve' )
+    parser.add_argument( '--page-size', type=int, default=2500, help='Page size the client asks for' )
+    parser.add_argument( '--prefetch', type=int, default=4, help='Pages the client fetches concurrently' )
+    parser.add_argument( '--workers', type=int, default=8, help='Concurrent channel writes' )
+    parser.add_argument( '--fuzzy', action='store_true', help='Turn on fuzzy grouping' )
+    parser.add_argument( '--fuzzy-threshold', type=float, default=0.8, help='Fuzzy grouping similarity' )
+    parser.add_argument( '--probe', action='store_true', help='Probe the stand-in streams, some slow and some dead, and rank the failover by them' )
+    parser.add_argument( '--probe-timeout', type=float, default=1.0, help='Seconds each probe gets' )
+    parser.add_argument( '--logos', action='store_true', help='Serve stand-in logos, some urls sharing an image, and sync them' )
+    parser.add_argument( '--legacy-api', action='store_true', help='Stand in for a server without direct channel creates or bulk updates' )
+    parser.add_argument( '--snapshot', help='Run against the streams in a snapshot saved with --snapshot-out instead of a synthetic corpus (--sizes is ignored)', default=None )
+    parser.add_argument( '--normalizer', action='append', help='Normalizer rule to use instead of the synthetic corpus one, repeat for several', default=None )
+    parser.add_argument( '--seed', type=int, default=1, help='Corpus seed, so runs are comparable' )
+    parser.add_argument( '--repeat', type=int, default=3, help='Runs per microbenchmark, the best is kept' )
+    parser.add_argument( '--memory', action='store_true', help='Track peak python memory, slows the sync down' )
+    parser.add_argument( '--micro-only', action='store_true', help='Only run the microbenchmarks' )
+    parser.add_argument( '--json', help='Also write the results to this file as JSON', default=None )
+
+    # return the parsed arguments
+    return parser.parse_args( )
+
+# run the benchmarks
+def main( ) -> None:
+
+    # pull in the arguments
+    args = parse_args( )
+
+    # run them all
+    sizes = [0] if args.snapshot else args.sizes
+    syncs = [] if args.micro_only else [bench_sync( size, args ) for size in sizes]
+    micros = [bench_micro( size, args ) for size in sizes]
+
+    # show them, and save them if we're asked to
+    report( syncs, micros )
+    if args.json:
+        with open( args.json, 'w' ) as handle:
+            json.dump( { 'syncs': syncs, 'micros': micros }, handle, indent=2 )
+
+# Run the benchmarks!
+if __name__ == "__main__":
+    main( )
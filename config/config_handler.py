@@ -1,14 +1,69 @@
 import os
 import configparser
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional, Sequence
 from getpass import getpass
 from pathlib import Path
 
 # global for the config file
 CONFIG_FILE = Path.home( ) / ".config" / ".dgcs_conf"
 
+# and for the local sync state, right next to it
+STATE_FILE = Path.home( ) / ".config" / ".dgcs_state.db"
+
+# the profile used when none is named, anything set in it is shared by the named ones
+DEFAULT_PROFILE = 'DEFAULT'
+
+# load up the config file, empty if it doesn't exist yet
+def _load( ) -> configparser.ConfigParser:
+
+    # setup the config reader
+    config = configparser.ConfigParser( )
+
+    # read the file if we have one
+    if os.path.exists( CONFIG_FILE ):
+        config.read( CONFIG_FILE )
+
+    # return the config
+    return config
+
+# the section name for a profile, "default" in any case is the default section
+def _section( profile: Optional[str] ) -> str:
+    return DEFAULT_PROFILE if not profile or profile.upper( ) == DEFAULT_PROFILE else profile
+
+# list the named profiles in the config file
+def list_profiles( ) -> List[str]:
+    return _load( ).sections( )
+
+# turn the requested profile names into the ones we'll run, "all" being every named profile... new ones only when we're setting them up
+def resolve_profiles( names: Optional[Sequence[str]], create: bool = False ) -> List[str]:
+
+    # nothing asked for is the default profile
+    if not names:
+        return [DEFAULT_PROFILE]
+
+    # hold what we have
+    available = list_profiles( )
+    profiles: List[str] = []
+
+    # loop over the names, allowing them comma separated too
+    for name in ( part.strip( ) for value in names for part in value.split( ',' ) if part.strip( ) ):
+
+        # every named profile, or the default one if there aren't any
+        if name.lower( ) == 'all':
+            profiles += available or [DEFAULT_PROFILE]
+            continue
+
+        # make sure it exists, unless it's about to
+        section = _section( name )
+        if section != DEFAULT_PROFILE and section not in available and not create:
+            raise ValueError( f"Unknown profile '{name}', the config has: {', '.join( available ) or 'no named profiles'}; use --reconfigure or pass its connection to add it" )
+        profiles.append( section )
+
+    # return them, dropping any repeats
+    return list( dict.fromkeys( profiles ) )
+
 # read the config file
-def read_config( ) -> Tuple[str, str, str, str]:
+def read_config( profile: Optional[str] = None ) -> Tuple[str, str, str, str]:
     
     # setup the config reader
     config = configparser.ConfigParser( )
@@ -20,28 +75,52 @@ def read_config( ) -> Tuple[str, str, str, str]:
     # read the file
     config.read( CONFIG_FILE )
 
-    # setup the returnable data, from the default profile
-    endpoint = config.get( 'DEFAULT', 'API_ENDPOINT', fallback=None )
-    username = config.get( 'DEFAULT', 'API_USER', fallback=None )
-    password = config.get( 'DEFAULT', 'API_PASS', fallback=None )
-    normalizer = config.get( 'DEFAULT', 'NORMALIZER', fallback=None )
+    # a profile we don't have yet has nothing of its own
+    section = _section( profile )
+    if section != DEFAULT_PROFILE and not config.has_section( section ):
+        return None, None, None, None
+
+    # setup the returnable data, from the profile, falling back to the default one
+    endpoint = config.get( section, 'API_ENDPOINT', fallback=None )
+    username = config.get( section, 'API_USER', fallback=None )
+    password = config.get( section, 'API_PASS', fallback=None )
+    normalizer = config.get( section, 'NORMALIZER', fallback=None )
 
     # return the config data
     return endpoint, username, password, normalizer
 
+# read an optional setting from a profile, falling back to the default one
+def read_setting( key: str, fallback: Optional[str] = None, profile: Optional[str] = None ) -> Optional[str]:
+
+    # setup the config reader and read the file
+    config = _load( )
+
+    # a profile we don't have falls back to the default one
+    section = _section( profile )
+    if section != DEFAULT_PROFILE and not config.has_section( section ):
+        section = DEFAULT_PROFILE
+
+    # return the setting
+    return config.get( section, key, fallback=fallback )
+
 # write the config
-def write_config( endpoint: str, username: str, password: str, normalizer: str ) -> None:
+def write_config( endpoint: str, username: str, password: str, normalizer: str, profile: Optional[str] = None ) -> None:
     
-    # setup the config parser
-    config = configparser.ConfigParser( )
+    # setup the config parser, keeping everything else that's already in there
+    config = _load( )
+
+    # make sure we have the profile
+    section = _section( profile )
+    if section != DEFAULT_PROFILE and not config.has_section( section ):
+        config.add_section( section )
 
-    # and the default config profile
-    config['DEFAULT'] = {
+    # and set its connection
+    config[section].update( {
         'API_ENDPOINT': endpoint,
         'API_USER': username,
         'API_PASS': password,
         'NORMALIZER': normalizer if normalizer else ''
-    }
+    } )
 
     # open the file for writing
     with open( CONFIG_FILE, 'w' ) as configfile:
@@ -50,42 +129,42 @@ def write_config( endpoint: str, username: str, password: str, normalizer: str )
         config.write( configfile )
 
 # prompt to get the input for the config
-def prompt_for_config( overwrite: bool = False ) -> Tuple[str, str, str]:
+def prompt_for_config( overwrite: bool = False, profile: Optional[str] = None ) -> Tuple[str, str, str]:
     
     # setup the input requests
-    print( "Please enter the following info..." )
+    print( f"Please enter the following info{f' for the {profile} profile' if _section( profile ) != DEFAULT_PROFILE else ''}..." )
     endpoint = input( "Dispatcharr URL [http(s)://HOST:PORT]: " ).strip( )
     username = input( "Username: " ).strip( )
     password = getpass( "Password: " ).strip( )
     normalizer = input( "Channel Name Normalizer RegExp (optional): " ).strip( )
     
     # check if we're set to overwrit the existing config
-    if overwrite or not os.path.exists( CONFIG_FILE ):
+    if overwrite or not os.path.exists( CONFIG_FILE ) or not any( read_config( profile )[:3] ):
 
         # we are, so write it out
-        write_config( endpoint, username, password, normalizer )
+        write_config( endpoint, username, password, normalizer, profile )
         print( f"Configuration saved to {CONFIG_FILE}" )
     
     # return the config
     return endpoint, username, password, normalizer
 
 # get the config
-def get_config( use_args: Optional[Tuple[str, str, str, str]] = None ) -> Tuple[str, str, str, str]:
+def get_config( use_args: Optional[Tuple[str, str, str, str]] = None, profile: Optional[str] = None ) -> Tuple[str, str, str, str]:
     
-    # If args provided, use them and save to config
-    if use_args and all( use_args ):
+    # If args provided, use them and save to config, the normalizer is optional
+    if use_args and all( use_args[:3] ):
 
         # setup the config frm the arguments
         endpoint, username, password, normalizer = use_args
 
         # write them to the config file
-        write_config( endpoint, username, password, normalizer )
+        write_config( endpoint, username, password, normalizer, profile )
 
         # return the config
         return endpoint, username, password, normalizer
     
     # Try to read from config file
-    endpoint, username, password, normalizer = read_config( )
+    endpoint, username, password, normalizer = read_config( profile )
     
     # if they're all there
     if all( [endpoint, username, password] ):
@@ -94,4 +173,4 @@ def get_config( use_args: Optional[Tuple[str, str, str, str]] = None ) -> Tuple[
         return endpoint, username, password, normalizer
     
     # Prompt user for config if we made it this far
-    return prompt_for_config( )
+    return prompt_for_config( profile=profile )
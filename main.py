@@ -1,21 +1,239 @@
 # default imports
-from config.config_handler import get_config, prompt_for_config
+from config.config_handler import get_config, prompt_for_config, read_config, read_setting, resolve_profiles, DEFAULT_PROFILE, STATE_FILE
 from utils.args import Args
+from utils.metrics import combined_summary, write_json, write_prometheus
+from utils.output import PrefixedOutput
+from utils.schedule import CronSchedule, IntervalSchedule
+from utils.snapshot import read_header
 from api.dchg_main import DCHG_Main
+from datetime import datetime
+from typing import Dict, List, Optional
+import signal
 import sys
+import threading
+
+# set once we've been asked to shut down, and whenever a sync should run right away
+STOP = threading.Event( )
+WAKE = threading.Event( )
+
+# the running clients, one per profile, so the signal handlers can see what they're up to
+CLIENTS: List[DCHG_Main] = []
 
 # our graceful exitter
 def graceful_exit( signum, frame ):
+
+    # if we're in the middle of writing, let the in-flight writes finish first
+    if any( client.writing for client in CLIENTS ) and not STOP.is_set( ):
+        print( "\nStopping once the in-flight channel writes finish (signal again to force)..." )
+        STOP.set( )
+        WAKE.set( )
+        return
     
     # exit the app and processes
     print( "\nOperation cancelled by user. Exiting..." )
     sys.exit( 0 )
 
+# kick off a sync right away
+def sync_now( signum, frame ):
+    print( "\nSync requested..." )
+    WAKE.set( )
+
+# run a single sync
+def run_sync( api: DCHG_Main, args, export: bool = True ) -> None:
+
+    # create/update the channels, making sure the metrics get out even if it blew up
+    print( "Starting channel creation..." )
+    try:
+        results = api.resume_channels( dry_run=args.dry_run ) if args.resume else api.create_channels( dry_run=args.dry_run, full=args.full )
+    finally:
+        if export:
+            export_metrics( [api], args )
+
+    # a dry run, or a replay, has already shown its plan
+    if not ( args.dry_run or args.snapshot_in ):
+        print( f"Successfully processed {len(results)} channels" )
+
+        # show what didn't make it
+        if api.failures:
+            print( f"Failed to process {len( api.failures )} channels" )
+
+    # show where the time went
+    print( f"Timings: {api.metrics.phase_line( )}" )
+
+# write out the run metrics, if we were asked to
+def export_metrics( clients: List[DCHG_Main], args ) -> None:
+
+    # give it a shot, a bad metrics path shouldn't fail the sync
+    try:
+
+        # a single instance keeps its own summary, several get them side by side
+        if args.metrics_json and len( clients ) == 1:
+            clients[0].metrics.write_json( args.metrics_json )
+        elif args.metrics_json:
+            write_json( args.metrics_json, [client.metrics for client in clients] )
+
+        # the textfile carries every instance either way
+        if args.metrics_prom:
+            write_prometheus( args.metrics_prom, [client.metrics for client in clients] )
+
+    # whoopsie...
+    except OSError as e:
+        print( f"Failed to write metrics: {str(e)}" )
+
+# sync every profile at once, each with its own client on its own thread
+def run_profiles( clients: List[DCHG_Main], args ) -> int:
+
+    # just the one, so run it right here
+    if len( clients ) == 1:
+        run_sync( clients[0], args )
+        return 0
+
+    # hold what went wrong, per profile
+    errors: Dict[str, Exception] = {}
+
+    # run one profile, tagging its output with the profile's name
+    def worker( client: DCHG_Main ) -> None:
+        if isinstance( sys.stdout, PrefixedOutput ):
+            sys.stdout.prefix( client.profile )
+        try:
+            run_sync( client, args, export=False )
+        except Exception as e:
+            errors[client.profile] = e
+            print( f"Sync failed: {str(e)}" )
+
+    # fire them all off, and wait for them to finish
+    threads = [threading.Thread( target=worker, args=( client, ), name=f"sync-{client.profile}", daemon=True ) for client in clients]
+    for thread in threads:
+        thread.start( )
+    for thread in threads:
+        thread.join( )
+
+    # write out the metrics for all of them, and show how it went
+    export_metrics( clients, args )
+    print_summary( clients, errors )
+
+    # return how many failed
+    return len( errors )
+
+# show how every profile's sync went, and the totals
+def print_summary( clients: List[DCHG_Main], errors: Dict[str, Exception] ) -> None:
+
+    # grab the summaries
+    summary = combined_summary( [client.metrics for client in clients] )
+
+    # show each profile
+    print( "\nSummary:" )
+    for client, run in zip( clients, summary['runs'] ):
+        if client.profile in errors:
+            print( f"  {client.profile}: failed after {run['duration_seconds']:.1f}s ({errors[client.profile]})" )
+            continue
+        channels = run['channels']
+        print( f"  {client.profile}: {channels['created']} created, {channels['updated']} updated, {channels['skipped']} unchanged, {channels['failed']} failed in {run['duration_seconds']:.1f}s" )
+
+    # and the totals
+    totals = summary['totals']
+    print( f"  total: {totals['channels']['created']} created, {totals['channels']['updated']} updated, {totals['channels']['skipped']} unchanged, {totals['channels']['failed']} failed, "
+           f"{totals['requests']} requests across {len( clients )} instances in {totals['duration_seconds']:.1f}s ({len( errors )} failed)" )
+
+# keep the clients warm and sync on a schedule until we're told to stop
+def run_daemon( clients: List[DCHG_Main], args ) -> None:
+
+    # setup the schedule
+    schedule = CronSchedule( args.cron ) if args.cron else IntervalSchedule( args.interval )
+    print( f"Running as a daemon, syncing {f'on {args.cron}' if args.cron else f'every {args.interval:g}s'} (SIGHUP syncs now, SIGTERM stops)" )
+
+    # SIGHUP runs a sync right away, where we have it
+    if hasattr( signal, 'SIGHUP' ):
+        signal.signal( signal.SIGHUP, sync_now )
+
+    # loop until we're stopped
+    while not STOP.is_set( ):
+
+        # run the sync, one failing shouldn't take the daemon down
+        WAKE.clear( )
+        try:
+            run_profiles( clients, args )
+        except Exception as e:
+            print( f"Sync failed: {str(e)}" )
+
+        # if we were stopped mid-sync, we're done
+        if STOP.is_set( ):
+            break
+
+        # wait for the next run, or a signal
+        next_run = schedule.next_run( datetime.now( ) )
+        print( f"Next sync at {next_run:%Y-%m-%d %H:%M:%S}" )
+        WAKE.wait( max( 0.0, ( next_run - datetime.now( ) ).total_seconds( ) ) )
+
+    # all done
+    print( "Daemon stopped." )
+
+# the values of a repeatable option, which may also be comma separated
+def split_values( values: Optional[List[str]] ) -> Optional[List[str]]:
+    return [value.strip( ) for value in ','.join( values ).split( ',' ) if value.strip( )] if values else None
+
+# setup the client for a profile
+def build_client( args, profile: str ) -> DCHG_Main:
+
+    # replaying a snapshot never talks to the server, so all it needs is the normalizer
+    if args.snapshot_in:
+        endpoint, username, password, normalizer = read_config( profile )
+        normalizer = "\n".join( args.normalizer ) if args.normalizer else normalizer
+        endpoint = read_header( args.snapshot_in ).get( 'instance' ) or endpoint or 'snapshot'
+
+    # are we reconfiguring?
+    elif args.reconfigure:
+
+        # we are, so make sure we are setting up what we need for it
+        endpoint, username, password, normalizer = prompt_for_config( overwrite=True, profile=profile )
+    
+    # nope
+    else:
+
+        # grab the config, either from the saved file, or the arguments passed
+        normalizer = "\n".join( args.normalizer ) if args.normalizer else None
+        endpoint, username, password, normalizer = get_config(
+            use_args = ( args.endpoint, args.username, args.password, normalizer ) if any( [args.endpoint, args.username, args.password, normalizer] ) else None,
+            profile = profile
+        )
+
+    # looks like we're missing something...
+    if not args.snapshot_in and not all( [endpoint, username, password] ):
+        raise ValueError( f"Missing required configuration parameters{f' for profile {profile}' if profile != DEFAULT_PROFILE else ''}" )
+
+    # return the main class
+    return DCHG_Main(
+        endpoint, username, password, normalizer, args.refresh,
+        page_size=args.page_size,
+        prefetch=args.prefetch,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        match_order=args.match_order,
+        folds=args.fold or read_setting( 'NORMALIZER_FOLD', profile=profile ),
+        fuzzy_threshold=args.fuzzy_threshold if args.fuzzy else None,
+        state_file=None if args.snapshot_in else STATE_FILE,
+        refresh_timeout=args.refresh_timeout,
+        stop_event=STOP,
+        quiet=args.quiet,
+        profile=None if profile == DEFAULT_PROFILE else profile,
+        probe_timeout=args.probe_timeout if args.probe else None,
+        probe_workers=args.probe_workers,
+        probe_ttl=args.probe_ttl,
+        probe_connections=args.probe_connections,
+        probe_insecure=args.probe_insecure,
+        logo_ttl=args.logo_ttl if args.logos else None,
+        time_budget=args.time_budget,
+        pins=split_values( args.pin ),
+        accounts=split_values( args.account ),
+        channel_groups=split_values( args.channel_group ),
+        snapshot_in=args.snapshot_in,
+        snapshot_out=args.snapshot_out
+    )
+
 # our main program
 def main( ):
 
     # Register the signal handlers for graceful exit
-    import signal
     signal.signal( signal.SIGINT, graceful_exit )  # CTRL-C
     signal.signal( signal.SIGTERM, graceful_exit )  # Termination signal
 
@@ -25,31 +243,38 @@ def main( ):
     # let's give it a shot
     try:
 
-        # are we reconfiguring?
-        if args.reconfigure:
-
-            # we are, so make sure we are setting up what we need for it
-            endpoint, username, password, normalizer = prompt_for_config( overwrite=True )
-        
-        # nope
-        else:
-
-            # grab the config, either from the saved file, or the arguments passed
-            endpoint, username, password, normalizer = get_config(
-                use_args = ( args.endpoint, args.username, args.password, args.normalizer ) if any( [args.endpoint, args.username, args.password, args.normalizer] ) else None
-            )
-
-        # looks like we're missing something...
-        if not all( [endpoint, username, password] ):
-            raise ValueError( "Missing required configuration parameters" )
-
-        # initialize the main class
-        api = DCHG_Main( endpoint, username, password, normalizer, args.refresh )
-        print( "Starting channel creation..." )
-        
-        # create/update the channels
-        results = api.create_channels( )
-        print( f"Successfully processed {len(results)} channels" )
+        # work out which profiles we're running
+        profiles = resolve_profiles( args.profile, create=bool( args.reconfigure or any( [args.endpoint, args.username, args.password, args.normalizer] ) ) )
+        if len( profiles ) > 1 and ( args.reconfigure or any( [args.endpoint, args.username, args.password, args.normalizer] ) ):
+            raise ValueError( "Pass a single --profile to reconfigure it, or to set its connection from the command line" )
+        if len( profiles ) > 1 and ( args.snapshot_in or args.snapshot_out ):
+            raise ValueError( "Pass a single --profile to save or replay a snapshot" )
+        if args.resume and ( args.daemon or args.refresh or args.snapshot_in or args.snapshot_out ):
+            raise ValueError( "A resume only finishes the last run's writes, it can't refresh, run as a daemon or use a snapshot" )
+        if args.snapshot_in and ( args.daemon or args.refresh or args.snapshot_out ):
+            raise ValueError( "A snapshot replay runs once against the saved data, it can't refresh, run as a daemon or save another snapshot" )
+
+        # make sure we let go of the connections and the state store
+        try:
+
+            # setup a client for each of them, the signal handlers watch them too
+            for profile in profiles:
+                CLIENTS.append( build_client( args, profile ) )
+
+            # several at once get their output tagged with the profile it came from
+            if len( CLIENTS ) > 1:
+                sys.stdout = PrefixedOutput( sys.stdout )
+
+            # keep running, or just the once
+            if args.daemon:
+                run_daemon( CLIENTS, args )
+            elif run_profiles( CLIENTS, args ):
+                sys.exit( 1 )
+
+        # clean up
+        finally:
+            for client in CLIENTS:
+                client.close( )
 
     # somebody doesn't want to run...
     except KeyboardInterrupt:
@@ -68,4 +293,3 @@ def main( ):
 # Run the app!
 if __name__ == "__main__":
     main( )
-    
\ No newline at end of file
@@ -11,9 +11,42 @@ class Args:
         parser.add_argument( '--endpoint', help='API endpoint URL' )
         parser.add_argument( '--username', help='API username' )
         parser.add_argument( '--password', help='API password' )
-        parser.add_argument( '--normalizer', help='RegExp to normalize channel names', default=None )        
+        parser.add_argument( '--normalizer', action='append', help='RegExp to normalize channel names, repeat for several; "PATTERN => REPLACEMENT" substitutes instead of deleting', default=None )        
         parser.add_argument( '--refresh', action='store_true', help='Force a full M3U refresh' )
+        parser.add_argument( '--refresh-timeout', type=float, default=600, help='Seconds to wait for the M3U refresh to finish before syncing anyway' )
         parser.add_argument( '--reconfigure', action='store_true',  help='Force reconfiguration and overwrite existing config' )
+        parser.add_argument( '--profile', nargs='+', help='Config profiles to sync, several run at once; "all" runs every profile', default=None )
+        parser.add_argument( '--page-size', type=int, default=2500, help='Records to request per page when fetching streams and channels' )
+        parser.add_argument( '--prefetch', type=int, default=4, help='Pages to fetch concurrently ahead of grouping (0 or 1 follows next links one at a time)' )
+        parser.add_argument( '--dry-run', action='store_true', help='Show which channels would be created or updated without writing anything' )
+        parser.add_argument( '--workers', type=int, default=4, help='Channel writes to run concurrently' )
+        parser.add_argument( '--batch-size', type=int, default=100, help='Channel updates to send per request when the server takes them in bulk (1 turns batching off)' )
+        parser.add_argument( '--time-budget', type=float, help='Seconds a sync may run for, writes that would run past it are deferred to the next run', default=None )
+        parser.add_argument( '--pin', action='append', help='Channel to put ahead of others with the same amount of change, repeat or comma separate for several', default=None )
+        parser.add_argument( '--match-order', default='name,normalized,tvg_id', help='Comma separated precedence for matching existing channels: name, normalized, tvg_id' )
+        parser.add_argument( '--fold', help='Comma separated folds applied when grouping names: case, whitespace, unicode', default=None )
+        parser.add_argument( '--fuzzy', action='store_true', help='Also group near-duplicate channel names together' )
+        parser.add_argument( '--fuzzy-threshold', type=float, default=0.8, help='Similarity (0-1] names need to be fuzzy grouped' )
+        parser.add_argument( '--probe', action='store_true', help='Probe the stream URLs and put the quickest to start first in each channel' )
+        parser.add_argument( '--probe-timeout', type=float, default=3.0, help='Seconds each stream probe gets to connect and send its first byte' )
+        parser.add_argument( '--probe-workers', type=int, default=32, help='Stream probes to run concurrently' )
+        parser.add_argument( '--probe-connections', type=int, default=2, help='Probes at once against a provider whose M3U account has no connection limit set' )
+        parser.add_argument( '--probe-insecure', action='store_true', help="Don't check provider HTTPS certificates when probing, for providers whose certificates are broken" )
+        parser.add_argument( '--probe-ttl', type=float, default=21600, help='Seconds a stream probe is reused before probing it again' )
+        parser.add_argument( '--logos', action='store_true', help='Sync channel logos too, registering each distinct logo on the server once' )
+        parser.add_argument( '--logo-ttl', type=float, default=86400, help='Seconds before a logo is checked again for changes at its source' )
+        parser.add_argument( '--account', action='append', help='Only sync streams from this M3U account (name or id), repeat or comma separate for several', default=None )
+        parser.add_argument( '--channel-group', action='append', help='Only sync streams in this channel group (name or id), repeat or comma separate for several', default=None )
+        parser.add_argument( '--snapshot-out', help='Save the fetched streams and channels to this compressed file, for replaying offline', default=None )
+        parser.add_argument( '--snapshot-in', help='Plan against a saved snapshot instead of the server, nothing is fetched or written', default=None )
+        parser.add_argument( '--resume', action='store_true', help='Finish the channel writes an interrupted run left in the journal, without refetching the streams' )
+        parser.add_argument( '--full', action='store_true', help='Ignore the local state cache and reconcile every group' )
+        parser.add_argument( '--daemon', action='store_true', help='Keep running, syncing on a schedule (SIGHUP syncs now, SIGTERM stops cleanly)' )
+        parser.add_argument( '--interval', type=float, default=3600, help='Seconds between daemon syncs' )
+        parser.add_argument( '--cron', help='Cron expression for daemon syncs, e.g. "0 */6 * * *" (overrides --interval)', default=None )
+        parser.add_argument( '--quiet', action='store_true', help='Skip the per-channel and per-cluster output' )
+        parser.add_argument( '--metrics-json', help='Write run metrics (phase timings, request counts and latencies) to this JSON file', default=None )
+        parser.add_argument( '--metrics-prom', help='Write run metrics in Prometheus text format to this file, e.g. for the node_exporter textfile collector', default=None )
         
         # return the parsed arguments
         return parser.parse_args( )
@@ -0,0 +1,162 @@
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence
+import codecs
+import json
+
+# whitespace json allows between tokens
+WHITESPACE = ' \t\n\r'
+
+# parse a json document as it arrives, yielding the records of one list without holding the whole thing
+class JSONStream:
+
+    # fire it up!
+    def __init__( self, chunks: Iterable[bytes], records_key: str = 'results', fields: Optional[Sequence[str]] = None, trim: int = 65536 ):
+
+        # everything at the top level that isn't the records, whether the document was just a list, and whether we found the records
+        self.meta: Dict[str, Any] = {}
+        self.is_list: Optional[bool] = None
+        self.found = False
+
+        # setup the internals
+        self._chunks = iter( chunks )
+        self._utf8 = codecs.getincrementaldecoder( 'utf-8' )( )
+        self._decoder = json.JSONDecoder( )
+        self._fields = tuple( fields ) if fields else None
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self._trim = trim
+        self._records = self._parse( records_key )
+
+    # we're our own iterator
+    def __iter__( self ) -> Iterator[Dict[str, Any]]:
+        return self
+
+    # the next record
+    def __next__( self ) -> Dict[str, Any]:
+        return next( self._records )
+
+    # pull in another chunk, returns false once there's nothing left
+    def _fill( self ) -> bool:
+
+        # nothing more to read
+        if self._eof:
+            return False
+
+        # drop what we've already parsed once it starts to pile up
+        if self._pos >= self._trim:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+
+        # grab the next non-empty chunk
+        for chunk in self._chunks:
+            text = self._utf8.decode( chunk )
+            if text:
+                self._buffer += text
+                return True
+
+        # that's the end of it
+        self._buffer += self._utf8.decode( b'', final=True )
+        self._eof = True
+        return False
+
+    # skip the whitespace and look at the next character, empty at the end of the document
+    def _peek( self ) -> str:
+
+        # loop until we find something that isn't whitespace
+        while True:
+            while self._pos < len( self._buffer ) and self._buffer[self._pos] in WHITESPACE:
+                self._pos += 1
+            if self._pos < len( self._buffer ):
+                return self._buffer[self._pos]
+            if not self._fill( ):
+                return ''
+
+    # consume the next character, making sure it's what we expect
+    def _expect( self, *chars: str ) -> str:
+        char = self._peek( )
+        if not char or char not in chars:
+            raise ValueError( f"Malformed JSON: expected {' or '.join( repr( c ) for c in chars )} at offset {self._pos}, got {char!r}" )
+        self._pos += 1
+        return char
+
+    # decode one complete value, reading more until it's all here
+    def _value( self ) -> Any:
+
+        # loop until the value decodes
+        self._peek( )
+        while True:
+
+            # give it a shot
+            try:
+                value, end = self._decoder.raw_decode( self._buffer, self._pos )
+
+            # it's cut off, so go get more, unless there is no more
+            except json.JSONDecodeError as e:
+                if not self._fill( ):
+                    raise ValueError( f"Malformed JSON: {e.msg} at offset {e.pos}" )
+                continue
+
+            # a number right at the end of the buffer may carry on in the next chunk
+            if end == len( self._buffer ) and isinstance( value, ( int, float ) ) and not isinstance( value, bool ) and self._fill( ):
+                continue
+
+            # move past it and return it
+            self._pos = end
+            return value
+
+    # keep only the fields we were asked for
+    def _project( self, record: Any ) -> Any:
+        if self._fields is None or not isinstance( record, dict ):
+            return record
+        return { field: record[field] for field in self._fields if field in record }
+
+    # yield each item of the list we're sitting on
+    def _array( self ) -> Iterator[Any]:
+
+        # open it up, it might be empty
+        self._expect( '[' )
+        self.found = True
+        if self._peek( ) == ']':
+            self._pos += 1
+            return
+
+        # hand off each item, one at a time
+        while True:
+            yield self._project( self._value( ) )
+            if self._expect( ',', ']' ) == ']':
+                return
+
+    # walk the document
+    def _parse( self, records_key: str ) -> Iterator[Any]:
+
+        # the document is the list itself
+        if self._peek( ) == '[':
+            self.is_list = True
+            yield from self._array( )
+            return
+
+        # otherwise it's an object holding the list alongside everything else
+        self._expect( '{' )
+        self.is_list = False
+        if self._peek( ) == '}':
+            self._pos += 1
+            return
+
+        # loop over the members
+        while True:
+
+            # grab the key
+            key = self._value( )
+            if not isinstance( key, str ):
+                raise ValueError( f"Malformed JSON: object key must be a string at offset {self._pos}" )
+            self._expect( ':' )
+
+            # stream the records, and keep everything else
+            if key == records_key and self._peek( ) == '[':
+                yield from self._array( )
+            else:
+                self.meta[key] = self._value( )
+
+            # on to the next member, or we're done
+            if self._expect( ',', '}' ) == '}':
+                return
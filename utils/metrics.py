@@ -0,0 +1,253 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, DefaultDict, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import json
+import os
+import threading
+import time
+
+# the request latency histogram buckets, in seconds
+LATENCY_BUCKETS = ( 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0 )
+
+# the phases of a sync, in the order they run
+PHASES = ( 'auth', 'refresh_wait', 'fetch', 'group', 'probe', 'logos', 'reconcile', 'write' )
+
+# the prometheus metric families we export, with their type and help
+FAMILIES = {
+    'dgcs_phase_seconds': ( 'gauge', 'Seconds spent in each phase of the last sync.' ),
+    'dgcs_requests_total': ( 'counter', 'API requests in the last sync, by endpoint and status.' ),
+    'dgcs_request_duration_seconds': ( 'histogram', 'API request latency in the last sync.' ),
+    'dgcs_retries_total': ( 'counter', 'API request retries in the last sync.' ),
+    'dgcs_reauths_total': ( 'counter', 'Re-authentications after a 401 in the last sync.' ),
+    'dgcs_channels_total': ( 'gauge', 'Channels in the last sync, by outcome.' ),
+    'dgcs_last_run_timestamp_seconds': ( 'gauge', 'When the last sync started.' ),
+    'dgcs_last_run_duration_seconds': ( 'gauge', 'How long the last sync took.' ),
+}
+
+# a latency histogram for one endpoint
+class _Histogram:
+
+    # fire it up!
+    def __init__( self ):
+        self.buckets = [0] * len( LATENCY_BUCKETS )
+        self.count = 0
+        self.sum = 0.0
+
+    # record a latency
+    def observe( self, seconds: float ) -> None:
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate( LATENCY_BUCKETS ):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+    # the approximate quantile, from the bucket bounds
+    def quantile( self, q: float ) -> float:
+
+        # find the first bucket that covers it
+        target = q * self.count
+        for bound, count in zip( LATENCY_BUCKETS, self.buckets ):
+            if count >= target:
+                return bound
+
+        # it's past the last bucket
+        return float( 'inf' )
+
+# the phase timers and counters for a sync run
+class Metrics:
+
+    # fire it up!
+    def __init__( self, instance: str = '', profile: Optional[str] = None ):
+
+        # setup the internals
+        self.instance = instance
+        self.profile = profile
+        self.started_at = time.time( )
+        self.finished_at = None
+        self.phases: Dict[str, float] = { phase: 0.0 for phase in PHASES }
+        self.requests: DefaultDict[str, DefaultDict[str, int]] = defaultdict( lambda: defaultdict( int ) )
+        self.latency: DefaultDict[str, _Histogram] = defaultdict( _Histogram )
+        self.retries: DefaultDict[str, int] = defaultdict( int )
+        self.reauths = 0
+        self.channels: Dict[str, int] = { 'created': 0, 'updated': 0, 'skipped': 0, 'failed': 0, 'cancelled': 0, 'deferred': 0 }
+        self._lock = threading.Lock( )
+
+    # time a phase, phases can run more than once and add up
+    @contextmanager
+    def phase( self, name: str ) -> Iterator[None]:
+        start = time.perf_counter( )
+        try:
+            yield
+        finally:
+            self.add_time( name, time.perf_counter( ) - start )
+
+    # add time to a phase
+    def add_time( self, name: str, seconds: float ) -> None:
+        with self._lock:
+            self.phases[name] = self.phases.get( name, 0.0 ) + seconds
+
+    # record a request
+    def observe_request( self, endpoint: str, status: Union[int, str], seconds: float ) -> None:
+        with self._lock:
+            self.requests[endpoint][str( status )] += 1
+            self.latency[endpoint].observe( seconds )
+
+    # record a retry
+    def retry( self, endpoint: str ) -> None:
+        with self._lock:
+            self.retries[endpoint] += 1
+
+    # record a re-authentication after a 401
+    def reauth( self ) -> None:
+        with self._lock:
+            self.reauths += 1
+
+    # count channel outcomes
+    def count( self, outcome: str, amount: int = 1 ) -> None:
+        with self._lock:
+            self.channels[outcome] = self.channels.get( outcome, 0 ) + amount
+
+    # mark the run as done
+    def finish( self ) -> None:
+        self.finished_at = time.time( )
+
+    # the run summary
+    def summary( self ) -> Dict[str, Any]:
+
+        # hold it still while we read it
+        with self._lock:
+            return {
+                'instance': self.instance,
+                'profile': self.profile,
+                'started_at': self.started_at,
+                'duration_seconds': ( self.finished_at or time.time( ) ) - self.started_at,
+                'phases': dict( self.phases ),
+                'requests': {
+                    endpoint: {
+                        'count': self.latency[endpoint].count,
+                        'statuses': dict( statuses ),
+                        'seconds_total': self.latency[endpoint].sum,
+                        'p50_seconds': self.latency[endpoint].quantile( 0.5 ),
+                        'p95_seconds': self.latency[endpoint].quantile( 0.95 ),
+                        'buckets': dict( zip( map( str, LATENCY_BUCKETS ), self.latency[endpoint].buckets ) ),
+                    }
+                    for endpoint, statuses in self.requests.items( )
+                },
+                'retries': dict( self.retries ),
+                'reauths': self.reauths,
+                'channels': dict( self.channels ),
+            }
+
+    # a one line summary of where the time went
+    def phase_line( self ) -> str:
+        return ', '.join( f"{phase} {seconds:.2f}s" for phase, seconds in self.phases.items( ) if seconds )
+
+    # the prometheus text exposition
+    def prometheus( self ) -> str:
+        return prometheus( [self] )
+
+    # the prometheus samples, as ( family, sample ) pairs
+    def samples( self ) -> List[Tuple[str, str]]:
+
+        # grab the summary, and the labels every series carries
+        summary = self.summary( )
+        base = f'dispatcharr="{_escape( self.instance )}"' + ( f',profile="{_escape( self.profile )}"' if self.profile else '' )
+        samples: List[Tuple[str, str]] = []
+
+        # the phases
+        samples += [( 'dgcs_phase_seconds', f'dgcs_phase_seconds{{{base},phase="{phase}"}} {seconds:.6f}' ) for phase, seconds in summary['phases'].items( )]
+
+        # the requests
+        samples += [
+            ( 'dgcs_requests_total', f'dgcs_requests_total{{{base},endpoint="{endpoint}",status="{status}"}} {count}' )
+            for endpoint, stats in summary['requests'].items( ) for status, count in stats['statuses'].items( )
+        ]
+
+        # the latency histograms
+        family = 'dgcs_request_duration_seconds'
+        for endpoint, stats in summary['requests'].items( ):
+            samples += [( family, f'{family}_bucket{{{base},endpoint="{endpoint}",le="{bound}"}} {count}' ) for bound, count in stats['buckets'].items( )]
+            samples.append( ( family, f'{family}_bucket{{{base},endpoint="{endpoint}",le="+Inf"}} {stats["count"]}' ) )
+            samples.append( ( family, f'{family}_sum{{{base},endpoint="{endpoint}"}} {stats["seconds_total"]:.6f}' ) )
+            samples.append( ( family, f'{family}_count{{{base},endpoint="{endpoint}"}} {stats["count"]}' ) )
+
+        # the retries
+        samples += [( 'dgcs_retries_total', f'dgcs_retries_total{{{base},endpoint="{endpoint}"}} {count}' ) for endpoint, count in summary['retries'].items( )]
+        samples.append( ( 'dgcs_reauths_total', f'dgcs_reauths_total{{{base}}} {summary["reauths"]}' ) )
+
+        # the channels
+        samples += [( 'dgcs_channels_total', f'dgcs_channels_total{{{base},outcome="{outcome}"}} {count}' ) for outcome, count in summary['channels'].items( )]
+
+        # when it ran, and for how long
+        samples.append( ( 'dgcs_last_run_timestamp_seconds', f'dgcs_last_run_timestamp_seconds{{{base}}} {summary["started_at"]:.3f}' ) )
+        samples.append( ( 'dgcs_last_run_duration_seconds', f'dgcs_last_run_duration_seconds{{{base}}} {summary["duration_seconds"]:.6f}' ) )
+
+        # return the samples
+        return samples
+
+    # write the json run summary
+    def write_json( self, path: Union[str, Path] ) -> None:
+        _write_atomic( path, json.dumps( self.summary( ), indent=2 ) )
+
+    # write the prometheus textfile
+    def write_prometheus( self, path: Union[str, Path] ) -> None:
+        _write_atomic( path, self.prometheus( ) )
+
+# the prometheus text exposition for one or more runs, each family listed once
+def prometheus( runs: Sequence[Metrics] ) -> str:
+
+    # gather the samples under their families
+    samples: DefaultDict[str, List[str]] = defaultdict( list )
+    for run in runs:
+        for family, sample in run.samples( ):
+            samples[family].append( sample )
+
+    # lay them out
+    lines: List[str] = []
+    for family, ( kind, description ) in FAMILIES.items( ):
+        lines += [f'# HELP {family} {description}', f'# TYPE {family} {kind}', *samples[family]]
+
+    # return the exposition
+    return '\n'.join( lines ) + '\n'
+
+# the summaries of several runs side by side, with the channel outcomes and requests totalled
+def combined_summary( runs: Sequence[Metrics] ) -> Dict[str, Any]:
+
+    # grab the summaries
+    summaries = [run.summary( ) for run in runs]
+
+    # total up the outcomes
+    channels: DefaultDict[str, int] = defaultdict( int )
+    for summary in summaries:
+        for outcome, count in summary['channels'].items( ):
+            channels[outcome] += count
+
+    # return them
+    return {
+        'runs': summaries,
+        'totals': {
+            'duration_seconds': max( ( summary['started_at'] + summary['duration_seconds'] for summary in summaries ), default=0 ) - min( ( summary['started_at'] for summary in summaries ), default=0 ),
+            'requests': sum( stats['count'] for summary in summaries for stats in summary['requests'].values( ) ),
+            'channels': dict( channels ),
+        },
+    }
+
+# write the prometheus textfile for several runs
+def write_prometheus( path: Union[str, Path], runs: Sequence[Metrics] ) -> None:
+    _write_atomic( path, prometheus( runs ) )
+
+# write the json summary for several runs
+def write_json( path: Union[str, Path], runs: Sequence[Metrics] ) -> None:
+    _write_atomic( path, json.dumps( combined_summary( runs ), indent=2 ) )
+
+# escape a prometheus label value
+def _escape( value: str ) -> str:
+    return value.replace( '\\', '\\\\' ).replace( '"', '\\"' ).replace( '\n', '\\n' )
+
+# write a file so readers never see it half written, the textfile collector needs this
+def _write_atomic( path: Union[str, Path], content: str ) -> None:
+    temp = f"{path}.tmp"
+    with open( temp, 'w' ) as handle:
+        handle.write( content )
+    os.replace( temp, path )
@@ -0,0 +1,56 @@
+from typing import Any, Callable, Optional, TextIO
+import sys
+import threading
+
+# stdout for several syncs at once, each thread's lines tagged with the profile it's running
+class PrefixedOutput:
+
+    # fire it up!
+    def __init__( self, stream: TextIO ):
+
+        # setup the internals
+        self.stream = stream
+        self._local = threading.local( )
+        self._lock = threading.Lock( )
+
+    # tag everything this thread prints from here on
+    def prefix( self, value: Optional[str] ) -> None:
+        self._local.prefix = value
+        self._local.pending = ''
+
+    # the prefix this thread is tagging with, if any
+    def current( self ) -> Optional[str]:
+        return getattr( self._local, 'prefix', None )
+
+    # write out whole lines only, so two threads never share one, tagged or not
+    def write( self, text: str ) -> int:
+
+        # hold onto a partial line until the rest of it shows up
+        prefix = self.current( )
+        *lines, self._local.pending = ( getattr( self._local, 'pending', '' ) + text ).split( '\n' )
+        if lines:
+            with self._lock:
+                self.stream.write( ''.join( f"[{prefix}] {line}\n" if prefix else f"{line}\n" for line in lines ) )
+
+        # return what we were handed
+        return len( text )
+
+    # flush the stream, a partial line waits for the rest of it
+    def flush( self ) -> None:
+        self.stream.flush( )
+
+    # everything else is the stream's
+    def __getattr__( self, name: str ) -> Any:
+        return getattr( self.stream, name )
+
+# an executor initializer tagging a pool's threads like the thread that starts the pool, none when there's nothing to tag
+def inherit_prefix( ) -> Optional[Callable[[], None]]:
+
+    # only when we're tagging at all
+    stream = sys.stdout
+    if not isinstance( stream, PrefixedOutput ) or not stream.current( ):
+        return None
+
+    # hand the prefix on
+    prefix = stream.current( )
+    return lambda: stream.prefix( prefix )
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+from typing import Set
+
+# the ( low, high ) bounds of each cron field
+CRON_FIELDS = ( ( 0, 59 ), ( 0, 23 ), ( 1, 31 ), ( 1, 12 ), ( 0, 7 ) )
+
+# parse a single cron field into the values it allows
+def _parse_cron_field( field: str, low: int, high: int ) -> Set[int]:
+
+    # hold the values
+    values = set( )
+
+    # loop over the comma separated parts
+    for part in field.split( ',' ):
+
+        # split off the step
+        span, _, step = part.partition( '/' )
+        step = int( step ) if step else 1
+
+        # work out the range
+        if span == '*':
+            start, end = low, high
+        elif '-' in span:
+            start, end = ( int( value ) for value in span.split( '-', 1 ) )
+        else:
+            start = int( span )
+            end = high if step > 1 else start
+
+        # make sure it's sane
+        if step < 1 or start < low or end > high or start > end:
+            raise ValueError( f"Invalid cron field '{field}'" )
+
+        # add them
+        values.update( range( start, end + 1, step ) )
+
+    # return the values
+    return values
+
+# a standard five field cron expression: minute hour day-of-month month day-of-week
+class CronSchedule:
+
+    # fire it up!
+    def __init__( self, expression: str ):
+
+        # make sure we have all five fields
+        fields = expression.split( )
+        if len( fields ) != 5:
+            raise ValueError( f"Invalid cron expression '{expression}', it needs five fields" )
+
+        # parse them
+        try:
+            parsed = [_parse_cron_field( field, low, high ) for field, ( low, high ) in zip( fields, CRON_FIELDS )]
+        except ValueError as e:
+            raise ValueError( f"Invalid cron expression '{expression}': {e}" ) from e
+
+        # setup the internals, sunday can be 0 or 7
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = { day % 7 for day in weekdays }
+
+        # like cron, when both day fields are restricted a match on either one counts
+        self.any_day = fields[2] == '*' or fields[4] == '*'
+
+    # does the day match
+    def _day_matches( self, when: datetime ) -> bool:
+
+        # cron counts the weekdays from sunday
+        day = when.day in self.days
+        weekday = ( when.weekday( ) + 1 ) % 7 in self.weekdays
+
+        # return if it matches
+        return ( day and weekday ) if self.any_day else ( day or weekday )
+
+    # the next run time after a moment
+    def next_run( self, after: datetime ) -> datetime:
+
+        # start at the next whole minute
+        when = after.replace( second=0, microsecond=0 ) + timedelta( minutes=1 )
+
+        # skip ahead a month, day, hour or minute at a time, for up to a few years
+        limit = when + timedelta( days=366 * 5 )
+        while when < limit:
+
+            # wrong month, jump to the start of the next one
+            if when.month not in self.months:
+                when = ( when.replace( day=1, hour=0, minute=0 ) + timedelta( days=32 ) ).replace( day=1 )
+                continue
+
+            # wrong day, jump to the start of the next one
+            if not self._day_matches( when ):
+                when = when.replace( hour=0, minute=0 ) + timedelta( days=1 )
+                continue
+
+            # wrong hour, jump to the start of the next one
+            if when.hour not in self.hours:
+                when = when.replace( minute=0 ) + timedelta( hours=1 )
+                continue
+
+            # wrong minute, try the next one
+            if when.minute not in self.minutes:
+                when += timedelta( minutes=1 )
+                continue
+
+            # found it
+            return when
+
+        # it can never run
+        raise ValueError( f"Cron expression '{self.expression}' never matches" )
+
+# a fixed number of seconds between runs
+class IntervalSchedule:
+
+    # fire it up!
+    def __init__( self, seconds: float ):
+
+        # make sure it's sane
+        if seconds <= 0:
+            raise ValueError( f"Invalid sync interval {seconds}, it must be more than 0 seconds" )
+
+        # setup the internals
+        self.seconds = seconds
+
+    # the next run time after a moment
+    def next_run( self, after: datetime ) -> datetime:
+        return after + timedelta( seconds=self.seconds )
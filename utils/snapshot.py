@@ -0,0 +1,146 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+import gzip
+import json
+import os
+import time
+
+# bump this if the layout changes
+SNAPSHOT_VERSION = 1
+
+# keep the lines as small as json gets
+_SEPARATORS = ( ',', ':' )
+
+# save what a sync fetched, so it can be replayed offline: a gzipped json line per record, the streams as bare rows
+class SnapshotWriter:
+
+    # fire it up!
+    def __init__( self, path: Union[str, Path], instance: str, fields: Sequence[str] ):
+
+        # setup the internals, writing next to the target so a failed run never leaves half a snapshot behind
+        self.path = Path( path )
+        self.fields = tuple( fields )
+        self.streams = 0
+        self.channels = 0
+        self._temp = self.path.with_name( self.path.name + '.tmp' )
+        self._file = gzip.open( self._temp, 'wt', encoding='utf-8' )
+
+        # the header
+        self._write( { 'version': SNAPSHOT_VERSION, 'instance': instance, 'captured_at': time.time( ), 'stream_fields': self.fields } )
+
+    # write a line
+    def _write( self, record: Any ) -> None:
+        self._file.write( json.dumps( record, separators=_SEPARATORS ) )
+        self._file.write( '\n' )
+
+    # record the streams as they go past
+    def record_streams( self, streams: Iterable[Dict[str, Any]] ) -> Iterator[Dict[str, Any]]:
+
+        # loop over the streams
+        for stream in streams:
+
+            # just the values, in field order
+            if isinstance( stream, dict ):
+                self._write( ['s', [stream.get( field ) for field in self.fields]] )
+                self.streams += 1
+
+            # hand it on
+            yield stream
+
+    # record the channels
+    def record_channels( self, channels: Iterable[Dict[str, Any]] ) -> None:
+        for channel in channels:
+            self._write( ['c', channel] )
+            self.channels += 1
+
+    # finish it off and move it into place
+    def close( self, meta: Optional[Dict[str, Any]] = None ) -> None:
+        self._write( ['end', { **( meta or {} ), 'streams': self.streams, 'channels': self.channels }] )
+        self._file.close( )
+        os.replace( self._temp, self.path )
+
+    # throw away what we have
+    def abort( self ) -> None:
+        self._file.close( )
+        self._temp.unlink( missing_ok=True )
+
+# read a snapshot back, the streams as they're read then the channels
+class SnapshotReader:
+
+    # fire it up!
+    def __init__( self, path: Union[str, Path] ):
+
+        # setup the internals
+        self.path = Path( path )
+        self._file = gzip.open( self.path, 'rt', encoding='utf-8' )
+        self._channels: List[Dict[str, Any]] = []
+        self.meta: Dict[str, Any] = {}
+
+        # make sure it's something we can read
+        try:
+            self.header = json.loads( self._file.readline( ) or 'null' )
+        except ( OSError, ValueError ) as e:
+            self._file.close( )
+            raise ValueError( f"{self.path} is not a snapshot: {e}" )
+        if not isinstance( self.header, dict ) or self.header.get( 'version' ) != SNAPSHOT_VERSION:
+            self._file.close( )
+            raise ValueError( f"{self.path} is not a version {SNAPSHOT_VERSION} snapshot" )
+        self.instance: str = self.header.get( 'instance' ) or ''
+        self.fields = tuple( self.header.get( 'stream_fields' ) or ( ) )
+
+    # the streams, read as they're asked for
+    def streams( self ) -> Iterator[Dict[str, Any]]:
+
+        # give it a shot
+        try:
+
+            # loop over the lines
+            for line in self._file:
+
+                # pull it apart
+                kind, record = json.loads( line )
+
+                # a stream goes back to being a dict
+                if kind == 's':
+                    yield dict( zip( self.fields, record ) )
+
+                # the channels come after the streams
+                elif kind == 'c':
+                    self._channels.append( record )
+
+                # the end, with whatever the capture noted about the server
+                elif kind == 'end':
+                    self.meta = record
+
+        # whoopsie... the file itself is damaged
+        except ( EOFError, OSError, ValueError ) as e:
+            raise ValueError( f"Snapshot {self.path} is damaged: {e}" )
+
+        # we're done with the file either way
+        finally:
+            self._file.close( )
+
+        # it never got to the end, so it's cut short
+        if not self.meta:
+            raise ValueError( f"Snapshot {self.path} is truncated" )
+
+    # the channels, once the streams have been read
+    def channels( self ) -> List[Dict[str, Any]]:
+
+        # read the rest if the streams weren't all asked for
+        if not self.meta:
+            for _ in self.streams( ):
+                pass
+
+        # return them
+        return self._channels
+
+    # let go of the file
+    def close( self ) -> None:
+        self._file.close( )
+
+# read just the header of a snapshot
+def read_header( path: Union[str, Path] ) -> Dict[str, Any]:
+    reader = SnapshotReader( path )
+    reader.close( )
+    return reader.header